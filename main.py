@@ -1,6 +1,7 @@
 import streamlit as st
 import plotly.graph_objects as go
-from src.api.api import analyze_sentiment
+from src.api.api import analyze_documents, analyze_sentiment
+from src.helpers.language import detect_language
 
 st.set_page_config(
     page_title="Trilingual Sentiment Analysis",
@@ -16,8 +17,8 @@ st.caption("English • Arabic • French — XLM-R + LoRA")
 
 with st.sidebar:
     st.header("Settings")
-    language = st.selectbox("Language", ["en", "ar", "fr"], index=0)
-    st.info("The model is multilingual; language selection is for examples and UX.")
+    language = st.selectbox("Language", ["auto", "en", "ar", "fr"], index=0)
+    st.info("The model is multilingual; with \"auto\" the language is detected from the text.")
 
 examples = {
     "en": "I absolutely love this product. It's amazing!",
@@ -60,6 +61,7 @@ if analyze:
             result = analyze_sentiment(text)
         sentiment = result["sentiment"].title()
         scores = result.get("scores", {})
+        st.caption(f"Language: {detect_language(text) if language == 'auto' else language}")
 
         # Display main prediction as a colored badge
         color_map = {"Negative": "#e74c3c", "Neutral": "#95a5a6", "Positive": "#2ecc71"}
@@ -87,10 +89,14 @@ if analyze:
 
 st.markdown("---")
 st.caption("Model: XLM-R base with LoRA adapter. This UI loads the model once.")
+import hashlib
+import time
+
 import plotly.graph_objects as go
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from peft import PeftModel
-import torch
+from src.api.api import analyze_sentiment_batch, available_adapters, get_config, tune_host
+from src.api.bulk import BulkJob, flatten_result, parse_records
+from src.helpers.metrics import metrics
+from src.models.registry import get_engine
 
 # -----------------------------
 # Page Config
@@ -376,16 +382,15 @@ st.markdown("""
 # -----------------------------
 @st.cache_resource
 def load_model():
-    base_model = "FacebookAI/xlm-roberta-base"
-    adapter_model = "osamanaguib/trilingual-sentiment-lora"
-
-    tokenizer = AutoTokenizer.from_pretrained(base_model)
-    model = AutoModelForSequenceClassification.from_pretrained(base_model, num_labels=3)
-    model = PeftModel.from_pretrained(model, adapter_model)
-    model.eval()
-    return tokenizer, model
+    # Runs once per process, not per rerun: tune this host if "autotune" is
+    # on, then load the instance src/api/api.py shares through the registry.
+    # get_config() also switches metrics on when metrics_enabled is set.
+    tune_host()
+    return get_engine(get_config())
 
-tokenizer, model = load_model()
+engine = load_model()
+# XLM-R's position limit; one window of analyze_documents
+WINDOW_TOKENS = 512
 
 # -----------------------------
 # Layout
@@ -408,146 +413,250 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Example section
-st.markdown("""
-    <div class='example-section'>
-        <div class='example-title'>💡 Try these examples:</div>
-        <div class='example-text'>
-            "I absolutely love this product!" • "هذا رائع جداً" • "C'est un mauvais film"
-        </div>
-    </div>
-""", unsafe_allow_html=True)
+# Extra LoRA adapters share the loaded base model; pick one per request
+adapters = available_adapters()
+adapter = st.selectbox("Adapter", adapters) if len(adapters) > 1 else None
 
-# Input
-text_input = st.text_area(
-    "Enter your text:",
-    height=140,
-    placeholder="Type or paste any text in English, Arabic, or French...",
-    help="The model will automatically detect the language and analyze sentiment"
-)
+tab_single, tab_bulk = st.tabs(["✍️ Single text", "📁 Bulk upload"])
 
-# Analyze button
-st.markdown("<div class='analyze-btn'>", unsafe_allow_html=True)
-analyze = st.button("🔍 Analyze Sentiment", use_container_width=True)
-st.markdown("</div>", unsafe_allow_html=True)
+with tab_single:
+    # Example section
+    st.markdown("""
+        <div class='example-section'>
+            <div class='example-title'>💡 Try these examples:</div>
+            <div class='example-text'>
+                "I absolutely love this product!" • "هذا رائع جداً" • "C'est un mauvais film"
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
 
-# Analysis
-if analyze:
-    if not text_input.strip():
-        st.warning("⚠️ Please enter some text to analyze.")
-    else:
-        with st.spinner("🤖 Analyzing sentiment..."):
-            inputs = tokenizer(text_input, return_tensors="pt", truncation=True, padding=True)
-            with torch.no_grad():
-                outputs = model(**inputs)
-                scores = torch.nn.functional.softmax(outputs.logits, dim=-1)[0]
+    # Input
+    text_input = st.text_area(
+        "Enter your text:",
+        height=140,
+        placeholder="Type or paste any text in English, Arabic, or French...",
+        help="The model will automatically detect the language and analyze sentiment"
+    )
 
-            labels = ["negative", "neutral", "positive"]
-            results = {label: float(score) for label, score in zip(labels, scores)}
+    # Analyze button
+    st.markdown("<div class='analyze-btn'>", unsafe_allow_html=True)
+    analyze = st.button("🔍 Analyze Sentiment", use_container_width=True)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-            predicted_label = labels[torch.argmax(scores)]
-            confidence = results[predicted_label]
+    # Analysis
+    if analyze:
+        if not text_input.strip():
+            st.warning("⚠️ Please enter some text to analyze.")
+        else:
+            with st.spinner("🤖 Analyzing sentiment..."):
+                # Inputs that fit one window go through the cached, deduplicated
+                # batch path; longer ones are scored as overlapping windows
+                # instead of truncated
+                if len(engine.tokenizer(text_input)["input_ids"]) <= WINDOW_TOKENS:
+                    document = analyze_sentiment_batch([text_input], max_tokens=WINDOW_TOKENS, adapter=adapter)[0]
+                else:
+                    document = analyze_documents([text_input], window_tokens=WINDOW_TOKENS, adapter=adapter)[0]
+                render_started = time.perf_counter()
+                results = document["scores"]
+
+                predicted_label = document["sentiment"]
+                confidence = results[predicted_label]
+                st.caption(f"Detected language: {detect_language(text_input).upper()}")
             
-            color_class = {
-                "positive": "positive",
-                "negative": "negative",
-                "neutral": "neutral"
-            }[predicted_label]
+                color_class = {
+                    "positive": "positive",
+                    "negative": "negative",
+                    "neutral": "neutral"
+                }[predicted_label]
             
-            emoji_map = {
-                "positive": "😊",
-                "negative": "😞",
-                "neutral": "😐"
-            }
+                emoji_map = {
+                    "positive": "😊",
+                    "negative": "😞",
+                    "neutral": "😐"
+                }
 
-            st.markdown("<div class='result-card'>", unsafe_allow_html=True)
+                st.markdown("<div class='result-card'>", unsafe_allow_html=True)
             
-            # Sentiment tag
-            st.markdown(
-                f"<div class='sentiment-tag {color_class}'>"
-                f"{emoji_map[predicted_label]} {predicted_label}"
-                f"</div>",
-                unsafe_allow_html=True
-            )
+                # Sentiment tag
+                st.markdown(
+                    f"<div class='sentiment-tag {color_class}'>"
+                    f"{emoji_map[predicted_label]} {predicted_label}"
+                    f"</div>",
+                    unsafe_allow_html=True
+                )
             
-            # Confidence box
-            st.markdown(f"""
-                <div class='confidence-box'>
-                    <div class='confidence-label'>Confidence Score</div>
-                    <div class='confidence-value'>{confidence:.1%}</div>
-                </div>
-            """, unsafe_allow_html=True)
+                # Confidence box
+                st.markdown(f"""
+                    <div class='confidence-box'>
+                        <div class='confidence-label'>Confidence Score</div>
+                        <div class='confidence-value'>{confidence:.1%}</div>
+                    </div>
+                """, unsafe_allow_html=True)
             
-            # Scores header
-            st.markdown("<div class='scores-header'>📊 Detailed Score Breakdown</div>", unsafe_allow_html=True)
-
-            # Enhanced Plotly visualization with better colors
-            colors = {
-                'negative': '#dc2626',
-                'neutral': '#d97706', 
-                'positive': '#059669'
-            }
+                # Scores header
+                st.markdown("<div class='scores-header'>📊 Detailed Score Breakdown</div>", unsafe_allow_html=True)
+
+                # Enhanced Plotly visualization with better colors
+                colors = {
+                    'negative': '#dc2626',
+                    'neutral': '#d97706', 
+                    'positive': '#059669'
+                }
             
-            bar_colors = [colors[label] for label in results.keys()]
+                bar_colors = [colors[label] for label in results.keys()]
             
-            fig = go.Figure(
-                data=[
-                    go.Bar(
-                        x=[label.capitalize() for label in results.keys()],
-                        y=list(results.values()),
-                        text=[f"<b>{v:.1%}</b>" for v in results.values()],
-                        textposition="outside",
-                        textfont=dict(size=16, color='#0f172a', family="Inter"),
-                        marker=dict(
-                            color=bar_colors,
-                            line=dict(color='white', width=3),
-                            opacity=0.95
-                        ),
-                        hovertemplate="<b>%{x}</b><br>Confidence: <b>%{y:.2%}</b><extra></extra>",
-                        width=[0.6, 0.6, 0.6]
-                    )
-                ]
-            )
+                fig = go.Figure(
+                    data=[
+                        go.Bar(
+                            x=[label.capitalize() for label in results.keys()],
+                            y=list(results.values()),
+                            text=[f"<b>{v:.1%}</b>" for v in results.values()],
+                            textposition="outside",
+                            textfont=dict(size=16, color='#0f172a', family="Inter"),
+                            marker=dict(
+                                color=bar_colors,
+                                line=dict(color='white', width=3),
+                                opacity=0.95
+                            ),
+                            hovertemplate="<b>%{x}</b><br>Confidence: <b>%{y:.2%}</b><extra></extra>",
+                            width=[0.6, 0.6, 0.6]
+                        )
+                    ]
+                )
             
-            fig.update_layout(
-                xaxis_title="<b>Sentiment Class</b>",
-                yaxis_title="<b>Confidence Score</b>",
-                plot_bgcolor="white",
-                paper_bgcolor="white",
-                font=dict(color="#0f172a", size=14, family="Inter", weight=600),
-                margin=dict(t=50, b=50, l=50, r=50),
-                height=380,
-                xaxis=dict(
-                    showgrid=False,
-                    tickfont=dict(size=14, family="Inter", color="#0f172a"),
-                    linecolor='#cbd5e1',
-                    linewidth=2
-                ),
-                yaxis=dict(
-                    showgrid=True,
-                    gridcolor="#e2e8f0",
-                    gridwidth=1,
-                    tickformat=".0%",
-                    range=[0, max(results.values()) * 1.2],
-                    linecolor='#cbd5e1',
-                    linewidth=2
-                ),
-                hoverlabel=dict(
-                    bgcolor="white",
-                    font_size=14,
-                    font_family="Inter",
-                    bordercolor="#cbd5e1"
+                fig.update_layout(
+                    xaxis_title="<b>Sentiment Class</b>",
+                    yaxis_title="<b>Confidence Score</b>",
+                    plot_bgcolor="white",
+                    paper_bgcolor="white",
+                    font=dict(color="#0f172a", size=14, family="Inter", weight=600),
+                    margin=dict(t=50, b=50, l=50, r=50),
+                    height=380,
+                    xaxis=dict(
+                        showgrid=False,
+                        tickfont=dict(size=14, family="Inter", color="#0f172a"),
+                        linecolor='#cbd5e1',
+                        linewidth=2
+                    ),
+                    yaxis=dict(
+                        showgrid=True,
+                        gridcolor="#e2e8f0",
+                        gridwidth=1,
+                        tickformat=".0%",
+                        range=[0, max(results.values()) * 1.2],
+                        linecolor='#cbd5e1',
+                        linewidth=2
+                    ),
+                    hoverlabel=dict(
+                        bgcolor="white",
+                        font_size=14,
+                        font_family="Inter",
+                        bordercolor="#cbd5e1"
+                    )
                 )
-            )
             
-            st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(fig, use_container_width=True)
             
-            # JSON output
-            st.markdown("<div style='margin-top: 2rem;'>", unsafe_allow_html=True)
-            st.json(results)
-            st.markdown("</div>", unsafe_allow_html=True)
+                # JSON output
+                st.markdown("<div style='margin-top: 2rem;'>", unsafe_allow_html=True)
+                st.json(results)
+                st.markdown("</div>", unsafe_allow_html=True)
             
-            st.markdown("</div>", unsafe_allow_html=True)
+                st.markdown("</div>", unsafe_allow_html=True)
+                metrics.observe("render", time.perf_counter() - render_started)
+
+# -----------------------------
+# Bulk upload: scored on a background thread so reruns never restart it
+# -----------------------------
+def show_bulk_job(job):
+    done, total = job.progress()
+    st.progress(done / total if total else 1.0, text=f"Scored {done:,} / {total:,} rows")
+    rows = job.results()
+    if rows:
+        st.dataframe([flatten_result(row) for row in rows], use_container_width=True, height=320)
+    if job.error is not None:
+        st.error(f"Scoring stopped: {job.error}")
+
+
+def poll_bulk_job(job):
+    show_bulk_job(job)
+    if not job.running:
+        # Rerun the page once so the download buttons appear
+        st.rerun()
+
+
+# Refresh only the progress area where st.fragment exists
+if hasattr(st, "fragment"):
+    poll_bulk_job = st.fragment(run_every=1.0)(poll_bulk_job)
+
+with tab_bulk:
+    upload = st.file_uploader(
+        "Upload a CSV, TSV or JSONL file",
+        type=["csv", "tsv", "jsonl"],
+        help="Each row needs a text column; results are added as sentiment and score columns.",
+    )
+    if upload is not None:
+        data = upload.getvalue()
+        job_key = "bulk_job_" + hashlib.sha1(f"{upload.name}\x00{adapter}".encode("utf-8") + data).hexdigest()
+        job = st.session_state.get(job_key)
+        if job is None:
+            try:
+                records = parse_records(data, upload.name)
+            except (ValueError, UnicodeDecodeError) as exc:
+                st.error(f"Could not read {upload.name}: {exc}")
+                records = []
+            columns = list(dict.fromkeys(key for record in records[:100] for key in record))
+            if records:
+                text_field = st.selectbox(
+                    "Text column",
+                    columns,
+                    index=columns.index("text") if "text" in columns else 0,
+                )
+                st.caption(f"{len(records):,} rows")
+                if st.button("🚀 Score file", use_container_width=True):
+                    job = BulkJob(
+                        records,
+                        text_field=text_field,
+                        score_fn=lambda texts, adapter=adapter: analyze_sentiment_batch(texts, batch_size=64, adapter=adapter),
+                    )
+                    st.session_state[job_key] = job.start()
+                    st.rerun()
+        elif job.running:
+            if st.button("⏹ Stop"):
+                job.cancel()
+            poll_bulk_job(job)
+            if not hasattr(st, "fragment"):
+                time.sleep(1.0)
+                st.rerun()
+        else:
+            show_bulk_job(job)
+            base_name = upload.name.rsplit(".", 1)[0]
+            cols_download = st.columns(2)
+            with cols_download[0]:
+                st.download_button(
+                    "⬇️ Download JSONL",
+                    job.to_jsonl(),
+                    file_name=f"{base_name}.scored.jsonl",
+                    mime="application/x-ndjson",
+                    use_container_width=True,
+                )
+            with cols_download[1]:
+                st.download_button(
+                    "⬇️ Download CSV",
+                    job.to_csv(),
+                    file_name=f"{base_name}.scored.csv",
+                    mime="text/csv",
+                    use_container_width=True,
+                )
+            if st.button("🔁 Score again"):
+                del st.session_state[job_key]
+                st.rerun()
+
+if metrics.enabled:
+    with st.expander("🛠️ Debug: stage timings"):
+        st.caption("Cumulative per-stage timings of this process (tokenize, forward, postprocess, cache lookup, render).")
+        st.dataframe(metrics.summary(), use_container_width=True)
+        st.code(metrics.render_prometheus(), language="text")
 
 # Footer
 st.markdown("""
@@ -1,23 +1,107 @@
 # api.py
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from peft import PeftModel
-
-# Load model and tokenizer once (global)
-BASE_MODEL = "FacebookAI/xlm-roberta-base"
-ADAPTER_MODEL = "osamanaguib/trilingual-sentiment-lora"
-
-tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
-base_model = AutoModelForSequenceClassification.from_pretrained(BASE_MODEL, num_labels=3)
-model = PeftModel.from_pretrained(base_model, ADAPTER_MODEL)
-model.eval()
-
-# Create a pipeline for sentiment analysis
-sentiment_pipeline = pipeline(
-    "text-classification",
-    model=model,
-    tokenizer=tokenizer,
-    return_all_scores=True
-)
+from typing import Iterable, List, Optional
+import asyncio
+import threading
+import weakref
+
+from src.helpers.cache import PredictionCache
+from src.helpers.config import load_config, resolve_path
+from src.helpers.metrics import metrics
+from src.helpers.text import dedupe
+from src.models.autotune import ensure_profile
+from src.models.engine import DEFAULT_ADAPTER, Predictions
+from src.models.loader import model_identity
+from src.models.registry import get_engine, resolve_config
+
+# The model is loaded on first use through the shared registry, so importing
+# this module stays cheap. The "backend" config key picks PyTorch or ONNX Runtime.
+_config = None
+_config_lock = threading.Lock()
+# True once configure() was given an explicit config
+_config_explicit = False
+_cache = None
+_cache_lock = threading.Lock()
+_batcher = None
+_batcher_lock = threading.Lock()
+# One in-flight limit per event loop (asyncio primitives are loop-bound)
+_async_limits = weakref.WeakKeyDictionary()
+
+
+class OverloadedError(RuntimeError):
+    """Raised by analyze_sentiment_async when max_queue_depth requests are in flight."""
+
+
+def get_config() -> dict:
+    """Config used by this module, read once per process."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                cfg = load_config()
+                if cfg.get("metrics_enabled"):
+                    metrics.enabled = True
+                _config = cfg
+    return _config
+
+
+def tune_host() -> None:
+    """Tune this host when ``autotune`` is on and its profile is missing or stale.
+
+    The sweep runs subprocesses and can take minutes, so only startup paths
+    call it (warmup(), the servers' main() and the Streamlit app), never a
+    request. The project config is re-read afterwards so the tuned settings
+    apply; a config passed to configure() is left alone.
+    """
+    global _config
+    with _config_lock:
+        if ensure_profile() is not None and not _config_explicit:
+            _config = None
+
+
+def configure(config: Optional[dict] = None) -> None:
+    """Use ``config`` (merged over defaults) instead of the project config.
+
+    Resets the prediction cache so it is rebuilt for the new model. Mostly
+    useful for tools and benchmarks that run against a local model.
+    """
+    global _config, _config_explicit, _cache
+    with _config_lock, _cache_lock:
+        _config = resolve_config(config)
+        _config_explicit = config is not None
+        _cache = None
+    if _config.get("metrics_enabled"):
+        metrics.enabled = True
+
+
+def get_cache() -> Optional[PredictionCache]:
+    """Shared prediction cache, or None when ``cache_enabled`` is false."""
+    global _cache
+    cfg = get_config()
+    if not cfg.get("cache_enabled", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = cfg.get("cache_path")
+                _cache = PredictionCache(
+                    model_identity(cfg),
+                    max_entries=cfg.get("cache_max_entries", 10000),
+                    path=resolve_path(path) if path else None,
+                )
+    return _cache
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters of the prediction cache."""
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
+
+
+def warmup() -> None:
+    """Calibrate if enabled, load the model and run one forward so the first request is not slow."""
+    tune_host()
+    analyze_sentiment("warmup")
+
 
 # Label map
 label_map = {
@@ -26,17 +110,219 @@ label_map = {
     "LABEL_2": "positive"
 }
 
-def analyze_sentiment(text: str):
+def available_adapters() -> List[str]:
+    """Names accepted by the ``adapter`` argument; "default" is adapter_model."""
+    return [DEFAULT_ADAPTER, *(get_config().get("extra_adapters") or {})]
+
+
+def analyze_sentiment(text: str, adapter: Optional[str] = None):
     """Takes a text input and returns predicted sentiment and scores."""
-    result = sentiment_pipeline(text)[0]
-    # Get label with max score
-    best = max(result, key=lambda x: x['score'])
-    sentiment = label_map.get(best['label'], best['label'])
+    return analyze_sentiment_batch([text], adapter=adapter)[0]
+
+
+def _batch_budget(max_batch_tokens: Optional[int]) -> dict:
+    """Token and memory limits for the batch scheduler, from args or config."""
+    cfg = get_config()
+    memory_mb = cfg.get("max_batch_memory_mb")
     return {
-        "input": text,
-        "sentiment": sentiment,
-        "scores": {
-            label_map.get(r['label'], r['label']): round(r['score'], 4)
-            for r in result
-        }
-    }
\ No newline at end of file
+        "max_batch_tokens": max_batch_tokens if max_batch_tokens is not None else cfg.get("max_batch_tokens"),
+        "max_batch_bytes": int(memory_mb * 1024 * 1024) if memory_mb else None,
+    }
+
+
+def analyze_sentiment_batch(
+    texts: Iterable[str],
+    batch_size: Optional[int] = None,
+    max_tokens: int = 512,
+    max_batch_tokens: Optional[int] = None,
+    adapter: Optional[str] = None,
+) -> List[dict]:
+    """Score many texts in token-budgeted, length-sorted batches.
+
+    Inputs are tokenized once, sorted by token length and packed into batches
+    of at most ``batch_size`` texts (config ``max_batch_size``) whose padded
+    size (``batch_size x padded_len``) stays within ``max_batch_tokens``
+    (config default), and under ``max_batch_memory_mb`` of estimated
+    activations when configured.
+    ``adapter`` picks one of ``extra_adapters`` (default: ``adapter_model``).
+    Each distinct normalize_text() form is scored once and its result fanned
+    out to every row that shares it. Results are returned in input order with
+    the same dict shape as analyze_sentiment(), ``input`` being the original
+    text.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+
+    # Texts that canonicalize to the same string (whitespace, Unicode
+    # variants, tatweel/harakat, curly quotes) are scored once
+    unique, inverse = dedupe(texts)
+    # Default-adapter entries keep the keys they had before adapters existed
+    variant = None if adapter in (None, DEFAULT_ADAPTER) else adapter
+    cache = get_cache()
+    if cache is not None:
+        with metrics.timer("cache_lookup", batch_size=len(unique)):
+            scored = cache.get_many(unique, variant)
+    else:
+        scored = [None] * len(unique)
+    todo = [i for i, hit in enumerate(scored) if hit is None]
+
+    if todo:
+        cfg = get_config()
+        engine = get_engine(cfg)
+        todo_texts = [unique[i] for i in todo]
+        predictions = engine.predict(
+            todo_texts,
+            batch_size=batch_size or cfg.get("max_batch_size", 32),
+            max_length=max_tokens,
+            adapter=adapter,
+            **_batch_budget(max_batch_tokens),
+        )
+        with metrics.timer("postprocess", batch_size=len(todo)):
+            for i, result in zip(todo, predictions.to_dicts(todo_texts, label_map)):
+                scored[i] = result
+        if cache is not None:
+            cache.put_many(
+                todo_texts,
+                [{"sentiment": scored[i]["sentiment"], "scores": scored[i]["scores"]} for i in todo],
+                variant,
+            )
+
+    # Copy scores so callers cannot mutate cached or shared entries
+    return [
+        {"input": text, "sentiment": scored[i]["sentiment"], "scores": dict(scored[i]["scores"])}
+        for text, i in zip(texts, inverse)
+    ]
+
+
+def get_batcher():
+    """Shared micro-batcher used by the async API, created on first use.
+
+    A single worker thread runs the forwards, so concurrent awaits are
+    scored together in batches of up to ``max_batch_size``.
+    """
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                from src.api.batcher import MicroBatcher
+
+                cfg = get_config()
+                max_batch_size = cfg.get("max_batch_size", 32)
+                _batcher = MicroBatcher(
+                    lambda texts, adapter=None: analyze_sentiment_batch(texts, batch_size=max_batch_size, adapter=adapter),
+                    max_batch_size=max_batch_size,
+                    max_wait_ms=cfg.get("max_wait_ms", 5.0),
+                )
+    return _batcher
+
+
+def _async_limit() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    limit = _async_limits.get(loop)
+    if limit is None:
+        limit = _async_limits[loop] = asyncio.Semaphore(get_config().get("max_queue_depth", 256))
+    return limit
+
+
+async def analyze_sentiment_async(
+    text: str,
+    adapter: Optional[str] = None,
+    timeout: Optional[float] = None,
+    wait: bool = False,
+) -> dict:
+    """Awaitable analyze_sentiment() that never blocks the event loop.
+
+    Requests go through the shared micro-batcher, so concurrent calls share
+    forwards. At most ``max_queue_depth`` calls per event loop are in flight:
+    beyond that, OverloadedError is raised, or with ``wait=True`` the call
+    waits for a free slot. ``timeout`` (seconds) covers waiting and scoring
+    and raises asyncio.TimeoutError; a call that times out or is cancelled
+    before its batch starts is dropped from the queue.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    limit = _async_limit()
+    if limit.locked():
+        if not wait:
+            raise OverloadedError(f"{get_config().get('max_queue_depth', 256)} requests already in flight")
+        await asyncio.wait_for(limit.acquire(), timeout)
+    else:
+        await limit.acquire()
+    try:
+        future = get_batcher().submit(text, adapter)
+        remaining = None if deadline is None else max(0.0, deadline - loop.time())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+        except BaseException:
+            future.cancel()
+            raise
+    finally:
+        limit.release()
+
+
+# XLM-R has 512 position embeddings, special tokens included
+MAX_WINDOW_TOKENS = 512
+
+
+def analyze_documents(
+    texts: Iterable[str],
+    window_tokens: int = 512,
+    stride: int = 128,
+    batch_size: Optional[int] = None,
+    return_windows: bool = False,
+    max_batch_tokens: Optional[int] = None,
+    adapter: Optional[str] = None,
+) -> List[dict]:
+    """Score long documents without truncating them.
+
+    Each document is split into overlapping windows of ``window_tokens``
+    tokens (``stride`` tokens shared between neighbours). Windows of all
+    documents are scored together in token-budgeted batches, then averaged
+    per document, weighted by window length. With ``return_windows`` each
+    result also lists ``windows`` with their character span and scores.
+    """
+    if window_tokens > MAX_WINDOW_TOKENS:
+        raise ValueError(f"window_tokens must be at most {MAX_WINDOW_TOKENS}, got {window_tokens}")
+    if stride >= window_tokens - 2:
+        # Each window holds window_tokens - 2 text tokens besides <s> and </s>
+        raise ValueError(f"stride must be less than window_tokens - 2 ({window_tokens - 2}), got {stride}")
+    texts = list(texts)
+    if not texts:
+        return []
+
+    import numpy as np
+
+    cfg = get_config()
+    engine = get_engine(cfg)
+    features, doc_index, spans = engine.encode_windows(texts, max_length=window_tokens, stride=stride)
+    probs = engine.score_probs(
+        features,
+        batch_size=batch_size or cfg.get("max_batch_size", 32),
+        adapter=adapter,
+        **_batch_budget(max_batch_tokens),
+    )
+
+    with metrics.timer("postprocess", batch_size=len(texts)):
+        # Average window probabilities per document, weighted by token count
+        doc_index = np.asarray(doc_index)
+        weights = np.asarray([sum(f["attention_mask"]) for f in features], dtype=np.float32)
+        totals = np.zeros((len(texts), probs.shape[1]), dtype=np.float32)
+        np.add.at(totals, doc_index, probs * weights[:, None])
+        doc_weights = np.bincount(doc_index, weights=weights, minlength=len(texts))
+        counts = np.bincount(doc_index, minlength=len(texts)).tolist()
+        uniform = np.full(probs.shape[1], 1.0 / probs.shape[1], dtype=np.float32)
+        doc_probs = np.where(doc_weights[:, None] > 0, totals / np.maximum(doc_weights, 1)[:, None], uniform)
+        results = Predictions(doc_probs, engine.id2label).to_dicts(texts, label_map)
+
+        if return_windows:
+            windows = [[] for _ in texts]
+            window_texts = [texts[doc][start:end] for doc, (start, end) in zip(doc_index.tolist(), spans)]
+            window_results = Predictions(probs, engine.id2label).to_dicts(window_texts, label_map)
+            for doc, (start, end), window in zip(doc_index.tolist(), spans, window_results):
+                windows[doc].append({"start_char": start, "end_char": end, **window})
+        for doc, result in enumerate(results):
+            result["num_windows"] = counts[doc]
+            if return_windows:
+                result["windows"] = windows[doc]
+    return results
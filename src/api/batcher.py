@@ -0,0 +1,90 @@
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Collect concurrent requests and score them together.
+
+    Requests are queued by submit() and picked up by a single worker thread,
+    which flushes a batch as soon as ``max_batch_size`` items are waiting or
+    ``max_wait_ms`` has passed since the first item of the batch arrived.
+    Each caller gets a Future resolved with its own result.
+
+    Requests naming an adapter are grouped by it, so each ``batch_fn`` call
+    scores one adapter's texts (passed as ``adapter=``). Futures cancelled
+    while still queued are dropped before scoring.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[str]], List[dict]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str, adapter: Optional[str] = None) -> Future:
+        future = Future()
+        self._queue.put((text, adapter, future))
+        return future
+
+    def close(self, timeout: float = None) -> None:
+        """Stop the worker after it drains the requests already queued."""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch) -> None:
+        groups: Dict[Optional[str], list] = {}
+        for text, adapter, future in batch:
+            # False when the caller cancelled (e.g. timed out) while queued
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(adapter, []).append((text, future))
+        for adapter, items in groups.items():
+            texts = [text for text, _ in items]
+            try:
+                if adapter is None:
+                    results = self.batch_fn(texts)
+                else:
+                    results = self.batch_fn(texts, adapter=adapter)
+            except Exception as exc:
+                for _, future in items:
+                    future.set_exception(exc)
+                continue
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
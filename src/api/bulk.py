@@ -0,0 +1,361 @@
+"""Streaming bulk scoring of JSONL/CSV files with resumable checkpoints.
+
+Usage::
+
+    python -m src.api.bulk reviews.jsonl scored.jsonl --field text
+
+Records flow through a generator pipeline (read -> batch -> score -> write),
+so memory stays flat regardless of file size. Each output line is the input
+record plus ``sentiment`` and ``scores``. Every few batches the output is
+flushed to disk and a checkpoint is written next to it; rerunning the same
+command after a crash truncates the output back to the last checkpoint and
+continues from there.
+
+BulkJob runs the same pipeline over in-memory records (e.g. an upload in the
+Streamlit app) on a background thread, exposing progress and partial results.
+"""
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import io
+import json
+import os
+import threading
+import time
+
+from src.helpers.language import detect_languages, partition_by_language
+
+CHECKPOINT_SUFFIX = ".ckpt.json"
+
+
+def is_csv(path) -> bool:
+    return Path(path).suffix.lower() in (".csv", ".tsv")
+
+
+def _as_record(line, where: str) -> dict:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError(f"{where}: expected a JSON object, got {type(record).__name__}")
+    return record
+
+
+def read_jsonl(path, offset: int = 0) -> Iterator[Tuple[dict, Optional[int]]]:
+    """Yield ``(record, end_offset)`` starting at byte ``offset``."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while True:
+            start = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            if line.strip():
+                yield _as_record(line, f"{path}, line at byte {start}"), f.tell()
+
+
+def read_csv(path, skip: int = 0) -> Iterator[Tuple[dict, Optional[int]]]:
+    """Yield ``(record, None)`` after skipping ``skip`` records."""
+    delimiter = "\t" if Path(path).suffix.lower() == ".tsv" else ","
+    with open(path, encoding="utf-8", newline="") as f:
+        for i, row in enumerate(csv.DictReader(f, delimiter=delimiter)):
+            if i >= skip:
+                yield row, None
+
+
+def parse_records(data: bytes, filename: str) -> List[dict]:
+    """Records of an uploaded .jsonl, .csv or .tsv file held in memory."""
+    text = data.decode("utf-8-sig")
+    suffix = Path(filename).suffix.lower()
+    if suffix in (".csv", ".tsv"):
+        delimiter = "\t" if suffix == ".tsv" else ","
+        return list(csv.DictReader(io.StringIO(text, newline=""), delimiter=delimiter))
+    return [
+        _as_record(line, f"{filename}, line {number}")
+        for number, line in enumerate(text.splitlines(), 1)
+        if line.strip()
+    ]
+
+
+def flatten_result(row: dict) -> dict:
+    """Output record with ``scores`` spread into ``score_<label>`` columns, for tables and CSV."""
+    flat = {k: v for k, v in row.items() if k != "scores"}
+    flat.update({f"score_{label}": score for label, score in (row.get("scores") or {}).items()})
+    return flat
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def score_records(
+    batches: Iterable[list],
+    text_field: str,
+    score_fn: Callable[[List[str]], List[dict]],
+    language_stats: Optional[dict] = None,
+) -> Iterator[Tuple[List[dict], Optional[int]]]:
+    """Score each batch, yielding output records and the batch's end offset.
+
+    With ``language_stats`` (a dict, updated in place) each batch is split by
+    detected language and scored one language at a time; records get a
+    ``language`` field and the dict accumulates records and seconds per
+    language.
+    """
+    for batch in batches:
+        texts = [str(record.get(text_field) or "") for record, _ in batch]
+        if language_stats is None:
+            results = score_fn(texts)
+            languages = None
+        else:
+            results = [None] * len(texts)
+            languages = detect_languages(texts)
+            for language, indices in partition_by_language(texts, languages).items():
+                started = time.perf_counter()
+                for i, result in zip(indices, score_fn([texts[i] for i in indices])):
+                    results[i] = result
+                stats = language_stats.setdefault(language, {"records": 0, "seconds": 0.0})
+                stats["records"] += len(indices)
+                stats["seconds"] += time.perf_counter() - started
+        scored = []
+        for i, ((record, _), result) in enumerate(zip(batch, results)):
+            row = {**record, "sentiment": result["sentiment"], "scores": result["scores"]}
+            if languages is not None:
+                row["language"] = languages[i]
+            scored.append(row)
+        yield scored, batch[-1][1]
+
+
+def language_report(language_stats: dict) -> dict:
+    """Records, seconds and records/second per language."""
+    return {
+        language: {
+            "records": stats["records"],
+            "seconds": round(stats["seconds"], 3),
+            "records_per_second": round(stats["records"] / stats["seconds"], 1) if stats["seconds"] > 0 else 0.0,
+        }
+        for language, stats in sorted(language_stats.items())
+    }
+
+
+def _load_checkpoint(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {}
+
+
+def _save_checkpoint(path: Path, state: dict) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def score_file(
+    input_path,
+    output_path,
+    text_field: str = "text",
+    batch_size: int = 64,
+    checkpoint_path=None,
+    resume: bool = True,
+    checkpoint_every: int = 10,
+    score_fn: Optional[Callable[[List[str]], List[dict]]] = None,
+    by_language: bool = False,
+) -> dict:
+    """Score ``input_path`` into ``output_path`` (JSONL) and return a summary.
+
+    With ``by_language`` batches are partitioned by detected language and
+    the summary reports throughput per language for this run.
+    """
+    if score_fn is None:
+        from src.api.api import analyze_sentiment_batch
+
+        score_fn = lambda texts: analyze_sentiment_batch(texts, batch_size=batch_size)
+
+    output_path = Path(output_path)
+    checkpoint_path = Path(checkpoint_path or str(output_path) + CHECKPOINT_SUFFIX)
+    state = _load_checkpoint(checkpoint_path) if resume else {}
+    if state.get("input") not in (None, str(input_path)):
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to {state['input']}, not {input_path}")
+    if state.get("done"):
+        return state
+    if state and not output_path.exists():
+        # Output from the previous run is gone; nothing to resume onto
+        state = {}
+
+    records_done = state.get("records", 0)
+    output_bytes = state.get("output_bytes", 0)
+    input_offset = state.get("input_offset") or 0
+
+    if is_csv(input_path):
+        records = read_csv(input_path, skip=records_done)
+    else:
+        records = read_jsonl(input_path, offset=input_offset)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    mode = "r+b" if records_done else "wb"
+    started = time.perf_counter()
+    scored_now = 0
+    language_stats = {} if by_language else None
+    with open(output_path, mode) as out:
+        # Drop anything written after the last checkpoint
+        out.seek(output_bytes if mode == "r+b" else 0)
+        out.truncate()
+        scored = score_records(batched(records, batch_size), text_field, score_fn, language_stats)
+        for n, (rows, end_offset) in enumerate(scored, 1):
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+            records_done += len(rows)
+            scored_now += len(rows)
+            if end_offset is not None:
+                input_offset = end_offset
+            if n % checkpoint_every == 0:
+                out.flush()
+                os.fsync(out.fileno())
+                _save_checkpoint(checkpoint_path, {
+                    "input": str(input_path),
+                    "records": records_done,
+                    "input_offset": input_offset,
+                    "output_bytes": out.tell(),
+                })
+        out.flush()
+        os.fsync(out.fileno())
+        output_bytes = out.tell()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "input": str(input_path),
+        "records": records_done,
+        "input_offset": input_offset,
+        "output_bytes": output_bytes,
+        "done": True,
+        "scored_this_run": scored_now,
+        "seconds": round(elapsed, 3),
+        "records_per_second": round(scored_now / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+    if language_stats is not None:
+        summary["languages"] = language_report(language_stats)
+    _save_checkpoint(checkpoint_path, summary)
+    return summary
+
+
+class BulkJob:
+    """Score ``records`` in batches on a background thread.
+
+    ``progress()`` and ``results()`` can be polled from another thread (the
+    Streamlit script) while scoring runs; results fill in batch by batch in
+    input order. ``cancel()`` stops after the current batch.
+    """
+
+    def __init__(
+        self,
+        records: List[dict],
+        text_field: str = "text",
+        batch_size: int = 64,
+        score_fn: Optional[Callable[[List[str]], List[dict]]] = None,
+    ):
+        if score_fn is None:
+            from src.api.api import analyze_sentiment_batch
+
+            score_fn = lambda texts: analyze_sentiment_batch(texts, batch_size=batch_size)
+        self.records = records
+        self.text_field = text_field
+        self.batch_size = batch_size
+        self.score_fn = score_fn
+        self.error: Optional[BaseException] = None
+        self.seconds = 0.0
+        self._results: List[dict] = []
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bulk-job", daemon=True)
+
+    def start(self) -> "BulkJob":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    @property
+    def done(self) -> bool:
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def progress(self) -> Tuple[int, int]:
+        """``(records scored, total records)``."""
+        with self._lock:
+            return len(self._results), len(self.records)
+
+    def results(self) -> List[dict]:
+        """Copy of the output records scored so far."""
+        with self._lock:
+            return list(self._results)
+
+    def to_jsonl(self) -> bytes:
+        return b"".join(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n" for row in self.results())
+
+    def to_csv(self) -> bytes:
+        rows = [flatten_result(row) for row in self.results()]
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+        return out.getvalue().encode("utf-8")
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        batches = batched(((record, None) for record in self.records), self.batch_size)
+        try:
+            for rows, _ in score_records(batches, self.text_field, self.score_fn):
+                with self._lock:
+                    self._results.extend(rows)
+                if self._cancelled.is_set():
+                    break
+        except Exception as exc:
+            self.error = exc
+        self.seconds = time.perf_counter() - started
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Score a JSONL/CSV file with analyze_sentiment_batch.")
+    parser.add_argument("input", help="Input .jsonl, .csv or .tsv file.")
+    parser.add_argument("output", help="Output .jsonl file.")
+    parser.add_argument("--field", default="text", help="Record field holding the text (default: text).")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint", default=None, help=f"Checkpoint file (default: OUTPUT{CHECKPOINT_SUFFIX}).")
+    parser.add_argument("--checkpoint-every", type=int, default=10, help="Batches between checkpoints.")
+    parser.add_argument("--no-resume", action="store_true", help="Ignore any existing checkpoint and start over.")
+    parser.add_argument(
+        "--by-language",
+        action="store_true",
+        help="Score each batch one detected language at a time, add a language field and report per-language throughput.",
+    )
+    args = parser.parse_args(argv)
+
+    summary = score_file(
+        args.input,
+        args.output,
+        text_field=args.field,
+        batch_size=args.batch_size,
+        checkpoint_path=args.checkpoint,
+        resume=not args.no_resume,
+        checkpoint_every=args.checkpoint_every,
+        by_language=args.by_language,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
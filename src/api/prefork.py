@@ -0,0 +1,202 @@
+"""Pre-fork HTTP serving: N worker processes sharing one copy of the weights.
+
+Usage::
+
+    python -m src.api.prefork [--workers N] [--threads-per-worker T] [server options]
+
+The parent loads the model without running it, binds the listening socket
+and forks. Workers inherit the weights copy-on-write and only ever read them,
+so those pages stay shared: adding a worker costs its activations and Python
+state, not another copy of XLM-R. ``gc.freeze()`` before forking keeps the
+garbage collector from touching (and so copying) the parent's objects. Each
+worker limits torch to T intra-op threads (default: cores // workers) so the
+pool does not oversubscribe the CPU, and runs its own micro-batcher. Workers
+that die are restarted; SIGINT/SIGTERM stop the pool.
+
+Stage timings live in each worker's own registry, so ``GET /metrics``
+answers 501 here; forward them with ``metrics.add_hook()`` instead.
+
+Only the torch backend shares weights: ONNX Runtime sessions own thread
+pools that do not survive fork, so with ``"backend": "onnx"`` each worker
+loads its own session after forking. Likewise with ``"fast_path": true`` the
+parent loads the eager model and each worker compiles it and runs the parity
+check itself before accepting requests.
+"""
+from typing import Optional, Tuple
+import gc
+import os
+import signal
+import sys
+import time
+import traceback
+
+from src.api.server import SentimentHTTPServer, build_parser, make_batcher, make_server
+from src.helpers.config import load_config
+from src.helpers.metrics import metrics
+from src.models.autotune import available_cpus, ensure_profile
+
+
+def plan_workers(
+    workers: Optional[int] = None,
+    threads_per_worker: Optional[int] = None,
+    cpus: Optional[int] = None,
+) -> Tuple[int, int]:
+    """``(workers, threads_per_worker)`` with ``workers x threads`` <= cores where possible."""
+    cpus = cpus or available_cpus()
+    if workers is None and threads_per_worker is None:
+        threads_per_worker = 1
+    if workers is None:
+        workers = max(1, cpus // threads_per_worker)
+    if threads_per_worker is None:
+        threads_per_worker = max(1, cpus // workers)
+    return workers, threads_per_worker
+
+
+def _set_threads(threads: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before any inter-op work has run in this process
+        pass
+
+
+def _raise_exit(signum, frame):
+    raise SystemExit(0)
+
+
+def _start_fast_path(cfg: dict) -> None:
+    """Compile the inherited eager engine in this worker when ``fast_path`` is on."""
+    if not cfg.get("fast_path") or cfg.get("backend", "torch") != "torch":
+        return
+    from src.models.compile import enable_fast_path
+    from src.models.registry import get_engine, registry
+
+    registry.add(cfg, enable_fast_path(get_engine({**cfg, "fast_path": False}), cfg))
+
+
+def _run_worker(server: SentimentHTTPServer, args, threads: int) -> None:
+    """Body of a forked worker; never returns."""
+    code = 0
+    try:
+        # The parent turns Ctrl-C into SIGTERM for every worker
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, _raise_exit)
+        _set_threads(threads)
+        from src.api.api import get_config
+
+        _start_fast_path(get_config())
+        server.batcher = make_batcher(args.max_batch_size, args.max_wait_ms)
+        server.serve_forever()
+    except SystemExit:
+        pass
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        if server.batcher is not None:
+            server.batcher.close(timeout=5)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # Skip the parent's cleanup handlers inherited through fork
+        os._exit(code)
+
+
+def serve(args, workers: int, threads: int) -> None:
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork serving needs os.fork (Linux/macOS)")
+
+    from src.api.api import get_config
+    from src.models.registry import get_engine
+
+    cfg = get_config()
+    if cfg.get("backend", "torch") == "torch":
+        if cfg.get("fast_path"):
+            from src.models.compile import check_fast_path
+
+            # Fail at startup rather than in every worker
+            check_fast_path(cfg)
+        # Load only: running a forward here would start thread pools in the
+        # parent, which do not survive fork. Compiling and the fast path's
+        # parity forwards are left to the workers (_start_fast_path)
+        get_engine({**cfg, "fast_path": False})
+
+    server = make_server(args.host, args.port, None)
+    server.serves_metrics = False
+    # Every worker accepts on the shared socket; the ones that lose the race
+    # get EAGAIN instead of blocking
+    server.socket.setblocking(False)
+
+    children = {}
+
+    def spawn() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(server, args, threads)
+        children[pid] = time.monotonic()
+
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    gc.collect()
+    gc.freeze()
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(
+        f"Serving on http://{args.host}:{args.port} with {workers} workers x {threads} threads "
+        f"(max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms})"
+    )
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = children.pop(pid, None)
+            if stopping or started is None:
+                continue
+            print(f"Worker {pid} exited with status {status}; restarting", file=sys.stderr)
+            # Back off when workers die right after starting
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)
+            spawn()
+    finally:
+        server.server_close()
+
+
+def main(argv=None) -> None:
+    ensure_profile()
+    cfg = load_config()
+    parser = build_parser(cfg, "Serve analyze_sentiment from pre-forked workers sharing one model.")
+    parser.add_argument("--workers", type=int, default=cfg.get("workers"), help="Worker processes (default: cores / threads).")
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=cfg.get("threads_per_worker"),
+        help="torch intra-op threads per worker (default: cores / workers).",
+    )
+    args = parser.parse_args(argv)
+    if args.metrics or cfg.get("metrics_enabled"):
+        metrics.enabled = True
+
+    workers, threads = plan_workers(args.workers, args.threads_per_worker)
+    serve(args, workers, threads)
+
+
+if __name__ == "__main__":
+    main()
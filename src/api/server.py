@@ -0,0 +1,168 @@
+"""Local HTTP/JSON endpoint backed by a micro-batching queue.
+
+Run with ``python -m src.api.server``. Endpoints:
+
+- ``POST /analyze`` with ``{"text": "..."}`` returns one result dict, or with
+  ``{"texts": [...]}`` returns a list of result dicts. An optional
+  ``"adapter"`` names one of the configured ``extra_adapters``.
+- ``GET /health`` returns ``{"status": "ok"}``.
+- ``GET /metrics`` returns per-stage timing histograms in the Prometheus
+  text format (empty unless metrics are enabled). The pre-fork pool answers
+  it with 501, since each worker only holds its own timings.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import argparse
+import json
+
+from src.api.batcher import MicroBatcher
+from src.helpers.config import load_config
+from src.helpers.metrics import metrics
+from src.models.autotune import ensure_profile
+
+
+class SentimentRequestHandler(BaseHTTPRequestHandler):
+    server_version = "TrilingualSentiment/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            if not self.server.serves_metrics:
+                self._send_json(
+                    501,
+                    {"error": "/metrics is not available from the pre-fork pool: each worker records its own "
+                              "timings; export them with metrics.add_hook() or use src.api.server"},
+                )
+                return
+            data = metrics.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/analyze":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send_json(400, {"error": "invalid JSON body"})
+            return
+        if not isinstance(payload, dict):
+            self._send_json(400, {"error": "expected a JSON object"})
+            return
+
+        from src.api.api import available_adapters
+
+        adapter = payload.get("adapter")
+        if adapter is not None and not isinstance(adapter, str):
+            self._send_json(400, {"error": "'adapter' must be a string"})
+            return
+        if adapter is not None and adapter not in available_adapters():
+            self._send_json(400, {"error": f"unknown adapter {adapter!r}; expected one of {available_adapters()}"})
+            return
+
+        texts = payload.get("texts")
+        if isinstance(texts, list):
+            if not all(isinstance(t, str) for t in texts):
+                self._send_json(400, {"error": "'texts' must be a list of strings"})
+                return
+        elif isinstance(payload.get("text"), str):
+            texts = None
+        else:
+            self._send_json(400, {"error": "expected 'text' or 'texts'"})
+            return
+
+        batcher = self.server.batcher
+        try:
+            if texts is not None:
+                futures = [batcher.submit(t, adapter) for t in texts]
+                body = [f.result() for f in futures]
+            else:
+                body = batcher.submit(payload["text"], adapter).result()
+        except Exception as exc:
+            self._send_json(500, {"error": str(exc)})
+            return
+        self._send_json(200, body)
+
+    def _send_json(self, status: int, body) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the request path quiet; errors are returned to the client
+        pass
+
+
+class SentimentHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver defaults to a backlog of 5, which drops bursts of clients
+    request_queue_size = 128
+    # The pre-fork pool turns this off: one worker's registry is not the pool's
+    serves_metrics = True
+
+    def __init__(self, server_address, batcher: Optional[MicroBatcher]):
+        super().__init__(server_address, SentimentRequestHandler)
+        # Pre-fork workers bind first and attach their own batcher after fork
+        self.batcher = batcher
+
+
+def make_server(host: str, port: int, batcher: Optional[MicroBatcher]) -> SentimentHTTPServer:
+    return SentimentHTTPServer((host, port), batcher)
+
+
+def build_parser(cfg: dict, description: str) -> argparse.ArgumentParser:
+    """Arguments shared by this server and the pre-fork pool (src/api/prefork.py)."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--host", default=cfg["server_host"])
+    parser.add_argument("--port", type=int, default=cfg["server_port"])
+    parser.add_argument("--max-batch-size", type=int, default=cfg["max_batch_size"])
+    parser.add_argument("--max-wait-ms", type=float, default=cfg["max_wait_ms"])
+    parser.add_argument("--metrics", action="store_true", help="Record stage timings for GET /metrics.")
+    return parser
+
+
+def make_batcher(max_batch_size: int, max_wait_ms: float) -> MicroBatcher:
+    """Micro-batcher feeding analyze_sentiment_batch."""
+    # Imported here so --help does not pay for model loading
+    from src.api.api import analyze_sentiment_batch
+
+    return MicroBatcher(
+        lambda texts, adapter=None: analyze_sentiment_batch(texts, batch_size=max_batch_size, adapter=adapter),
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+    )
+
+
+def main(argv=None) -> None:
+    # Calibrate before reading the config so tuned settings become the defaults
+    ensure_profile()
+    cfg = load_config()
+    args = build_parser(cfg, "Serve analyze_sentiment over HTTP with micro-batching.").parse_args(argv)
+    if args.metrics or cfg.get("metrics_enabled"):
+        metrics.enabled = True
+
+    batcher = make_batcher(args.max_batch_size, args.max_wait_ms)
+    server = make_server(args.host, args.port, batcher)
+    print(f"Serving on http://{args.host}:{args.port} (max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Deterministic synthetic en/ar/fr review texts for benchmarks."""
+from typing import Dict, List, Optional
+import random
+
+_WORDS: Dict[str, Dict[str, List[str]]] = {
+    "en": {
+        "subject": ["The product", "This phone", "The service", "Our hotel room", "The delivery", "This movie"],
+        "verb": ["was", "is", "seemed", "felt", "turned out"],
+        "opinion": ["great", "terrible", "okay", "amazing", "disappointing", "average", "wonderful", "awful"],
+        "filler": [
+            "and the staff answered every question",
+            "although the price went up last month",
+            "but I would still order it again",
+            "even after waiting for two weeks",
+            "compared to the one I had before",
+        ],
+    },
+    "ar": {
+        "subject": ["المنتج", "هذا الهاتف", "الخدمة", "غرفة الفندق", "التوصيل", "هذا الفيلم"],
+        "verb": ["كان", "أصبح", "بدا"],
+        "opinion": ["رائع", "سيئ", "عادي", "ممتاز", "مخيب", "جميل", "فظيع", "مقبول"],
+        "filler": [
+            "والموظفون أجابوا على كل الأسئلة",
+            "رغم أن السعر ارتفع الشهر الماضي",
+            "لكنني سأطلبه مرة أخرى",
+            "حتى بعد الانتظار أسبوعين",
+            "مقارنة بالذي كان لدي من قبل",
+        ],
+    },
+    "fr": {
+        "subject": ["Le produit", "Ce téléphone", "Le service", "La chambre d'hôtel", "La livraison", "Ce film"],
+        "verb": ["était", "est", "semblait", "s'est révélé"],
+        "opinion": ["génial", "horrible", "correct", "incroyable", "décevant", "moyen", "excellent", "affreux"],
+        "filler": [
+            "et le personnel a répondu à toutes les questions",
+            "même si le prix a augmenté le mois dernier",
+            "mais je le commanderais encore",
+            "même après deux semaines d'attente",
+            "par rapport à celui que j'avais avant",
+        ],
+    },
+}
+
+LANGUAGES = tuple(_WORDS)
+
+
+def synthetic_text(rng: random.Random, language: str, clauses: int = 1) -> str:
+    words = _WORDS[language]
+    parts = [f"{rng.choice(words['subject'])} {rng.choice(words['verb'])} {rng.choice(words['opinion'])}"]
+    parts.extend(rng.choice(words["filler"]) for _ in range(clauses - 1))
+    return " ".join(parts) + "."
+
+
+def synthetic_texts(
+    n: int,
+    language: Optional[str] = None,
+    min_clauses: int = 1,
+    max_clauses: int = 6,
+    seed: int = 0,
+) -> List[str]:
+    """``n`` reproducible review-like texts of mixed length.
+
+    ``language`` fixes one of en/ar/fr; by default languages rotate so the
+    sample is evenly trilingual.
+    """
+    rng = random.Random(seed)
+    return [
+        synthetic_text(rng, language or LANGUAGES[i % len(LANGUAGES)], rng.randint(min_clauses, max_clauses))
+        for i in range(n)
+    ]
@@ -0,0 +1,227 @@
+"""Offline latency/throughput benchmark.
+
+Usage::
+
+    python -m src.benchmarks.run [--output bench.json] [--full-size | --project-model]
+
+By default a tiny randomly initialised XLM-R + LoRA adapter is built under
+``--workdir`` (see tiny_model.py), so the run needs no network and numbers
+reflect code changes rather than model size. The report is JSON with the
+git commit it was taken at; diff two reports to spot regressions.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from src.benchmarks.corpus import LANGUAGES, synthetic_texts
+from src.helpers.config import PROJECT_ROOT, load_config, resolve_path
+
+# Loads the model in a fresh interpreter so imports and file reads count
+_COLD_START = """
+import json, sys, time
+started = time.perf_counter()
+from src.models.registry import ModelRegistry
+imported = time.perf_counter()
+engine = ModelRegistry().get(json.loads(sys.argv[1]))
+loaded = time.perf_counter()
+engine.predict_proba([sys.argv[2]])
+done = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "load_seconds": loaded - imported,
+    "first_request_seconds": done - loaded,
+    "total_seconds": done - started,
+}))
+"""
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p95/p99 plus mean and max of ``samples``."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def rank(q: float) -> float:
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    return {
+        "p50": round(rank(0.50), 3),
+        "p95": round(rank(0.95), 3),
+        "p99": round(rank(0.99), 3),
+        "mean": round(sum(ordered) / len(ordered), 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def environment() -> dict:
+    def git(*args: str) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    info = {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import torch
+        import transformers
+
+        info.update(torch=torch.__version__, transformers=transformers.__version__, torch_threads=torch.get_num_threads())
+    except ImportError:
+        pass
+    return info
+
+
+def measure_cold_start(config: dict, text: str = "The service was great.") -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _COLD_START, json.dumps(config), text],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return {k: round(v, 3) for k, v in timings.items()}
+
+
+def measure_latency(fn, texts: Sequence[str], iterations: int, warmup: int = 5) -> dict:
+    """Per-call latency of ``fn(text)`` in milliseconds."""
+    for text in texts[:warmup]:
+        fn(text)
+    samples = []
+    for i in range(iterations):
+        text = texts[i % len(texts)]
+        started = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"iterations": iterations, "ms": percentiles(samples)}
+
+
+def measure_throughput(texts: Sequence[str], batch_sizes: Sequence[int]) -> List[dict]:
+    from src.api.api import analyze_sentiment_batch
+
+    rows = []
+    for batch_size in batch_sizes:
+        analyze_sentiment_batch(list(texts[:batch_size]), batch_size=batch_size)
+        started = time.perf_counter()
+        analyze_sentiment_batch(list(texts), batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        rows.append({
+            "batch_size": batch_size,
+            "texts": len(texts),
+            "seconds": round(elapsed, 3),
+            "texts_per_second": round(len(texts) / elapsed, 1),
+        })
+    return rows
+
+
+def measure_tokenization(engine, per_language: int = 500, repeats: int = 3) -> dict:
+    """Tokenizer cost and token counts per language, best of ``repeats``."""
+    report = {}
+    for language in LANGUAGES:
+        texts = synthetic_texts(per_language, language=language, seed=2)
+        best = float("inf")
+        for _ in range(repeats):
+            started = time.perf_counter()
+            features = engine.encode(texts)
+            best = min(best, time.perf_counter() - started)
+        tokens = sum(len(f["input_ids"]) for f in features)
+        report[language] = {
+            "us_per_text": round(best / len(texts) * 1e6, 2),
+            "tokens_per_text": round(tokens / len(texts), 2),
+            "chars_per_token": round(sum(len(t) for t in texts) / tokens, 2),
+        }
+    return report
+
+
+def run_benchmarks(
+    config: dict,
+    iterations: int = 200,
+    batch_sizes: Sequence[int] = (1, 8, 32, 64),
+    throughput_texts: int = 512,
+    cold_start: bool = True,
+) -> dict:
+    """Run every measurement against ``config`` and return the report."""
+    from src.api import api
+    from src.models.pipeline import SentimentPipeline
+    from src.models.registry import get_engine, resolve_config
+
+    cfg = resolve_config(config)
+    report = {"environment": environment(), "config": {k: cfg[k] for k in sorted(config)}}
+    if cold_start:
+        report["cold_start"] = measure_cold_start(cfg)
+
+    api.configure(cfg)
+    engine = get_engine(cfg)
+    texts = synthetic_texts(max(iterations, 100), seed=3)
+    pipeline = SentimentPipeline(cfg)
+    report["latency"] = {
+        "analyze_sentiment": measure_latency(api.analyze_sentiment, texts, iterations),
+        "pipeline_predict": measure_latency(lambda t: pipeline.predict(t, "en"), texts, iterations),
+    }
+    report["throughput"] = measure_throughput(synthetic_texts(throughput_texts, seed=4), batch_sizes)
+    report["tokenization"] = measure_tokenization(engine)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Offline sentiment latency/throughput benchmark.")
+    parser.add_argument("--output", default=None, help="Write the JSON report here (default: stdout).")
+    parser.add_argument("--workdir", default="artifacts/bench-model", help="Where the local test model is built.")
+    model = parser.add_mutually_exclusive_group()
+    model.add_argument("--full-size", action="store_true", help="Random model at the full config.json size.")
+    model.add_argument("--project-model", action="store_true", help="Benchmark the configured model instead.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the local test model.")
+    parser.add_argument("--iterations", type=int, default=200, help="Single-request latency samples.")
+    parser.add_argument("--batch-sizes", default="1,8,32,64", help="Comma-separated batch sizes.")
+    parser.add_argument("--throughput-texts", type=int, default=512)
+    parser.add_argument("--no-cold-start", action="store_true", help="Skip the subprocess cold-start run.")
+    args = parser.parse_args(argv)
+
+    if args.project_model:
+        config = {**load_config(), "cache_enabled": False}
+    else:
+        from src.benchmarks.tiny_model import build_tiny_model
+
+        workdir = resolve_path(args.workdir) / ("full" if args.full_size else "tiny")
+        config = build_tiny_model(workdir, shrink=not args.full_size, force=args.rebuild)
+
+    report = run_benchmarks(
+        config,
+        iterations=args.iterations,
+        batch_sizes=[int(b) for b in args.batch_sizes.split(",") if b],
+        throughput_texts=args.throughput_texts,
+        cold_start=not args.no_cold_start,
+    )
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
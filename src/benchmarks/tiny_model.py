@@ -0,0 +1,126 @@
+"""Build a randomly initialised XLM-R classifier and LoRA adapter on disk.
+
+Nothing is downloaded: the tokenizer is a small unigram model trained on the
+synthetic corpus, the encoder follows ``src/helpers/config.json`` (optionally
+shrunk), and the adapter gets random LoRA weights so merging is not a no-op.
+The returned config overrides point ``base_model``/``adapter_model`` at the
+local copies, so the regular loader, registry and API run against it.
+"""
+from pathlib import Path
+import json
+
+from src.benchmarks.corpus import synthetic_texts
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+
+# Encoder size used when shrinking; the vocabulary is whatever the local
+# tokenizer learned
+TINY_ARCHITECTURE = {
+    "hidden_size": 128,
+    "num_hidden_layers": 2,
+    "num_attention_heads": 2,
+    "intermediate_size": 512,
+}
+
+
+def build_tokenizer(vocab_size: int = 2000):
+    from tokenizers import SentencePieceUnigramTokenizer
+    from tokenizers.processors import RobertaProcessing
+    from transformers import XLMRobertaTokenizerFast
+
+    unigram = SentencePieceUnigramTokenizer()
+    unigram.train_from_iterator(
+        synthetic_texts(3000, max_clauses=4, seed=1),
+        vocab_size=vocab_size,
+        special_tokens=SPECIAL_TOKENS,
+        unk_token="<unk>",
+        show_progress=False,
+    )
+    backend = unigram._tokenizer
+    backend.post_processor = RobertaProcessing(sep=("</s>", 2), cls=("<s>", 0))
+    return XLMRobertaTokenizerFast(
+        tokenizer_object=backend,
+        bos_token="<s>",
+        eos_token="</s>",
+        sep_token="</s>",
+        cls_token="<s>",
+        unk_token="<unk>",
+        pad_token="<pad>",
+        mask_token="<mask>",
+        model_max_length=512,
+    )
+
+
+def build_model_config(vocab_size: int, num_labels: int = 3, shrink: bool = True):
+    """XLMRobertaConfig from src/helpers/config.json, shrunk to TINY_ARCHITECTURE."""
+    from transformers import XLMRobertaConfig
+
+    reference = json.loads(Path(__file__).resolve().parents[1].joinpath("helpers", "config.json").read_text())
+    known = XLMRobertaConfig().to_dict()
+    fields = {k: v for k, v in reference.items() if k in known and k != "architectures"}
+    if shrink:
+        fields.update(TINY_ARCHITECTURE)
+    fields["vocab_size"] = vocab_size
+    labels = ["negative", "neutral", "positive"][:num_labels]
+    return XLMRobertaConfig(
+        **fields,
+        num_labels=num_labels,
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)},
+    )
+
+
+def build_tiny_model(
+    output_dir,
+    shrink: bool = True,
+    lora_rank: int = 8,
+    num_labels: int = 3,
+    seed: int = 0,
+    force: bool = False,
+) -> dict:
+    """Write ``base/`` and ``adapter/`` under ``output_dir`` and return config overrides.
+
+    Reuses an existing build unless ``force`` is set.
+    """
+    output = Path(output_dir)
+    base_dir, adapter_dir = output / "base", output / "adapter"
+    overrides = {
+        "base_model": str(base_dir),
+        "adapter_model": str(adapter_dir),
+        "num_labels": num_labels,
+        # Keep benchmark builds away from the project's artifacts
+        "merged_model_dir": str(output / "merged"),
+        "onnx_model_dir": str(output / "onnx"),
+        "backend": "torch",
+        "inference_mode": "fp32",
+        "cache_enabled": False,
+    }
+    if not force and (adapter_dir / "adapter_config.json").exists():
+        return overrides
+
+    import torch
+    from peft import LoraConfig, TaskType, get_peft_model
+    from transformers import XLMRobertaForSequenceClassification
+
+    torch.manual_seed(seed)
+    tokenizer = build_tokenizer()
+    model = XLMRobertaForSequenceClassification(
+        build_model_config(len(tokenizer), num_labels=num_labels, shrink=shrink)
+    )
+    model.save_pretrained(base_dir)
+    tokenizer.save_pretrained(base_dir)
+
+    lora = LoraConfig(
+        task_type=TaskType.SEQ_CLS,
+        r=lora_rank,
+        lora_alpha=2 * lora_rank,
+        target_modules=["query", "value"],
+    )
+    peft_model = get_peft_model(model, lora)
+    with torch.no_grad():
+        for name, param in peft_model.named_parameters():
+            # lora_B starts at zero; randomise it so the adapter changes outputs
+            if "lora_B" in name:
+                param.normal_(std=0.02)
+    peft_model.save_pretrained(adapter_dir)
+    return overrides
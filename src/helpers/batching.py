@@ -0,0 +1,63 @@
+from typing import Callable, List, Optional, Sequence
+
+
+def estimate_forward_bytes(
+    batch_size: int,
+    seq_len: int,
+    hidden_size: int = 768,
+    intermediate_size: int = 3072,
+    num_attention_heads: int = 12,
+    bytes_per_value: int = 4,
+) -> int:
+    """Rough peak activation memory of one encoder layer's forward.
+
+    Counts the hidden states and Q/K/V projections, the attention score and
+    probability matrices, and the feed-forward intermediate activations.
+    Layers run one after another, so the peak is roughly one layer's worth.
+    """
+    per_token = 4 * hidden_size + intermediate_size
+    attention = 2 * num_attention_heads * seq_len * seq_len
+    return bytes_per_value * batch_size * (seq_len * per_token + attention)
+
+
+def plan_batches(
+    lengths: Sequence[int],
+    max_batch_size: int,
+    max_batch_tokens: Optional[int] = None,
+    max_batch_bytes: Optional[int] = None,
+    estimate_bytes: Optional[Callable[[int, int], int]] = None,
+) -> List[List[int]]:
+    """Group input indices into batches under a padded-token budget.
+
+    Indices are sorted by length (longest first) and packed greedily while
+    ``batch_size * padded_len`` stays within ``max_batch_tokens`` and, when
+    given, ``estimate_bytes(batch_size, padded_len)`` stays within
+    ``max_batch_bytes``. Each batch only pads to its own longest member, and
+    an input that alone exceeds a budget still gets a batch of its own.
+    Callers use the returned indices to restore input order.
+    """
+    if max_batch_size < 1:
+        raise ValueError("max_batch_size must be >= 1")
+    if max_batch_bytes is not None and estimate_bytes is None:
+        estimate_bytes = estimate_forward_bytes
+
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        if current:
+            size = len(current) + 1
+            # Sorted longest first, so the first member sets the padded length
+            padded_len = lengths[current[0]]
+            fits = size <= max_batch_size
+            if fits and max_batch_tokens is not None:
+                fits = size * padded_len <= max_batch_tokens
+            if fits and max_batch_bytes is not None:
+                fits = estimate_bytes(size, padded_len) <= max_batch_bytes
+            if not fits:
+                batches.append(current)
+                current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
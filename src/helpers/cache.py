@@ -0,0 +1,136 @@
+"""Prediction cache with an in-memory LRU tier and an optional SQLite tier.
+
+Keys are a hash of the normalized input text plus a namespace identifying the
+model, so a different model or a rebuilt artifact never reads stale entries.
+An optional ``variant`` (e.g. the LoRA adapter) separates entries further.
+The SQLite tier survives restarts and can be shared by several processes
+(Streamlit sessions, server workers) pointing at the same file, even while
+they serve different models. Rows of retired models stay until
+``purge_other_namespaces()`` is called as a maintenance step.
+"""
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence
+import hashlib
+import json
+import sqlite3
+import threading
+
+from src.helpers.text import normalize_text
+
+
+class PredictionCache:
+    def __init__(self, namespace: str, max_entries: int = 10000, path=None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._db = None
+        if path:
+            self._open_disk(Path(path))
+
+    def _open_disk(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def key(self, text: str, variant: Optional[str] = None) -> str:
+        prefix = self.namespace if variant is None else f"{self.namespace}\x00{variant}"
+        data = f"{prefix}\x00{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(data).hexdigest()
+
+    def get_many(self, texts: Sequence[str], variant: Optional[str] = None) -> List[Optional[dict]]:
+        """Return the cached value for each text, or None on a miss."""
+        keys = [self.key(t, variant) for t in texts]
+        values = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                value = self._memory.get(key)
+                if value is None:
+                    missing.append(i)
+                else:
+                    self._memory.move_to_end(key)
+                    values[i] = value
+                    self._counters["hits"] += 1
+
+            if missing and self._db is not None:
+                wanted = list({keys[i] for i in missing})
+                found = {}
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(wanted), 500):
+                    chunk = wanted[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM predictions WHERE key IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                    found.update((k, json.loads(v)) for k, v in rows)
+                still_missing = []
+                for i in missing:
+                    value = found.get(keys[i])
+                    if value is None:
+                        still_missing.append(i)
+                    else:
+                        values[i] = value
+                        self._counters["disk_hits"] += 1
+                        self._remember(keys[i], value)
+                missing = still_missing
+
+            self._counters["misses"] += len(missing)
+        return values
+
+    def put_many(self, texts: Sequence[str], values: Sequence[dict], variant: Optional[str] = None) -> None:
+        keys = [self.key(t, variant) for t in texts]
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._remember(key, value)
+            if self._db is not None:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO predictions (key, namespace, value) VALUES (?, ?, ?)",
+                        [(k, self.namespace, json.dumps(v, ensure_ascii=False)) for k, v in zip(keys, values)],
+                    )
+
+    def _remember(self, key: str, value: dict) -> None:
+        # Caller holds self._lock
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = sum(self._counters[k] for k in ("hits", "disk_hits", "misses"))
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "size": len(self._memory),
+                "max_entries": self.max_entries,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Drop this namespace's entries; other models sharing the file keep theirs."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM predictions WHERE namespace = ?", (self.namespace,))
+
+    def purge_other_namespaces(self) -> int:
+        """Delete disk rows written under any other namespace; returns the count.
+
+        Only safe once no process still serves those models from this file.
+        """
+        if self._db is None:
+            return 0
+        with self._lock, self._db:
+            cursor = self._db.execute("DELETE FROM predictions WHERE namespace != ?", (self.namespace,))
+        return cursor.rowcount
@@ -1,18 +1,97 @@
 from pathlib import Path
 import json
+import socket
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Per-host tuned settings written by `python -m src.models.autotune`
+PROFILE_PATH = Path(__file__).with_name("autotune.json")
 
 DEFAULTS = {
-    "model_name": "cardiffnlp/twitter-xlm-roberta-base-sentiment",
     "use_transformers": True,
     # Optional mapping for models that output LABEL_0/1/2
     "label_mapping": {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"},
+    # XLM-R + LoRA classifier shared by src/api/api.py, main.py and SentimentPipeline
+    "base_model": "FacebookAI/xlm-roberta-base",
+    "adapter_model": "osamanaguib/trilingual-sentiment-lora",
+    # More LoRA adapters on the same base model, {name: hub id or path};
+    # pick one per request with adapter=name ("default" is adapter_model)
+    "extra_adapters": {},
+    "num_labels": 3,
+    # Directory written by `python -m src.models.loader build`; preferred when present
+    "merged_model_dir": "artifacts/merged",
+    # "fp32" or "int8" (dynamic int8 linear layers, CPU only; see src/models/quantize.py)
+    "inference_mode": "fp32",
+    # "torch", "onnx" (export with `python -m src.models.onnx_backend export`)
+    # or "student" (train with `python -m src.models.distill`)
+    "backend": "torch",
+    "onnx_model_dir": "artifacts/onnx",
+    "student_model_dir": "artifacts/student",
+    # Batch scheduler: cap on batch_size x padded_len per forward, and an
+    # optional cap on estimated activation memory per forward
+    "max_batch_tokens": 8192,
+    "max_batch_memory_mb": None,
+    # SentimentPipeline cascade: unambiguous lexicon hits scoring at least
+    # cascade_threshold skip the transformer
+    "cascade_enabled": False,
+    "cascade_threshold": 0.7,
+    # Prediction cache used by analyze_sentiment*; set cache_path to add a
+    # SQLite tier shared across processes and restarts
+    "cache_enabled": True,
+    "cache_max_entries": 10000,
+    "cache_path": None,
+    # Micro-batching (src/api/server.py and analyze_sentiment_async)
+    "server_host": "127.0.0.1",
+    "server_port": 8000,
+    "max_batch_size": 32,
+    "max_wait_ms": 5.0,
+    # analyze_sentiment_async: in-flight requests per event loop before
+    # OverloadedError (or waiting, with wait=True)
+    "max_queue_depth": 256,
+    # SDPA attention + torch.compile on bucketed shapes (src/models/compile.py),
+    # falling back to eager if compiling fails or drifts from eager past the tolerance
+    "fast_path": False,
+    "fast_path_tolerance": 1e-3,
+    # torch thread pools; None keeps the torch defaults
+    "intra_op_threads": None,
+    "inter_op_threads": None,
+    # Calibrate threads and max_batch_size on first start on a host (see
+    # src/models/autotune.py), keeping batch p95 latency under the ceiling
+    "autotune": False,
+    "autotune_latency_ms": 250.0,
+    # Pre-fork pool (src/api/prefork.py); None picks from the CPU count
+    "workers": None,
+    "threads_per_worker": None,
+    # Per-stage timing histograms (GET /metrics, Streamlit debug panel)
+    "metrics_enabled": False,
 }
 
 
+def host_key() -> str:
+    return socket.gethostname()
+
+
+def load_profiles() -> dict:
+    """Every host's tuning profile, keyed by host name."""
+    if not PROFILE_PATH.exists():
+        return {}
+    try:
+        return json.loads(PROFILE_PATH.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def load_profile() -> dict:
+    """Tuned settings saved for this host, or an empty dict."""
+    return dict(load_profiles().get(host_key(), {}).get("settings", {}))
+
+
 def load_config() -> dict:
     """Load configuration from config.json and merge with defaults.
 
-    Returns a dict with safe defaults if the file is missing or invalid.
+    Settings tuned for this host sit between the defaults and config.json,
+    so explicit values in config.json always win. Returns a dict with safe
+    defaults if the file is missing or invalid.
     """
     cfg_path = Path(__file__).with_name("config.json")
     data = {}
@@ -23,6 +102,11 @@ def load_config() -> dict:
             # Fall back silently to defaults on parse error
             data = {}
 
-    merged = {**DEFAULTS, **data}
+    merged = {**DEFAULTS, **load_profile(), **data}
     return merged
-    
\ No newline at end of file
+
+
+def resolve_path(path) -> Path:
+    """Resolve a config path relative to the project root."""
+    path = Path(path)
+    return path if path.is_absolute() else PROJECT_ROOT / path
@@ -0,0 +1,96 @@
+"""Dependency-free en/ar/fr language identification.
+
+Arabic is recognised by script: text is Arabic when at least half its
+letters are in the Arabic Unicode blocks, or when it holds an Arabic word
+and its Latin part has no English or French stopword signal, which covers
+code-switched text like "موبايل iPhone 15 pro max ممتاز". Latin-script text
+is split between French and English with one precompiled regex scan that
+counts stopwords of each language, French elisions (l', qu', c'est) and
+French diacritics. A short text costs a few
+microseconds, so detection can run on every request.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import re
+
+LANGUAGES = ("en", "ar", "fr")
+
+_ARABIC = re.compile("[؀-ۿݐ-ݿࢠ-ࣿﭐ-﷿ﹰ-﻿]")
+_LETTER = re.compile(r"[^\W\d_]")
+# Arabic letters that make a code-switched text Arabic when the Latin part
+# has no stopword signal: one short word
+_MIN_ARABIC = 3
+
+_EN_STOPWORDS = (
+    "the", "is", "are", "was", "were", "and", "it", "this", "that", "to", "of", "i", "you", "my",
+    "not", "for", "in", "with", "but", "have", "very", "so", "be", "they", "would", "what",
+)
+_FR_STOPWORDS = (
+    "le", "la", "les", "des", "du", "un", "une", "est", "et", "je", "tu", "il", "elle", "nous",
+    "vous", "pas", "pour", "dans", "avec", "mais", "très", "ce", "cette", "qui", "que", "sont",
+    "au", "aux", "sur", "mon", "ma", "mes", "été", "bien", "trop",
+)
+# French elided articles and pronouns: l'hôtel, j'aime, qu'il, c'est
+_FR_ELISION = r"(?<!\w)(?:[cdjlmnst]|qu)['’]"
+_FR_DIACRITICS = "àâæçéèêëîïôœùûüÿ"
+
+_LATIN_SIGNALS = re.compile(
+    r"(?<!\w)(?:({en})|({fr}))(?!\w)|({elision})|([{diacritics}])".format(
+        en="|".join(sorted(_EN_STOPWORDS, key=len, reverse=True)),
+        fr="|".join(sorted(_FR_STOPWORDS, key=len, reverse=True)),
+        elision=_FR_ELISION,
+        diacritics=_FR_DIACRITICS,
+    )
+)
+
+
+def _latin_scores(lowered: str) -> Tuple[float, float]:
+    en = fr = 0.0
+    for stop_en, stop_fr, elision, accent in _LATIN_SIGNALS.findall(lowered):
+        if stop_en:
+            en += 1
+        elif stop_fr or elision:
+            fr += 1
+        elif accent:
+            fr += 0.5
+    return en, fr
+
+
+def _classify(text: str, arabic: int, find_letters, default: str) -> str:
+    # Letters are only counted when some Arabic was found
+    if arabic and arabic * 2 >= len(find_letters(text)):
+        return "ar"
+    en, fr = _latin_scores(text.lower())
+    if en == fr:
+        # No Latin signal: an Arabic word in a mostly Latin-script text
+        # (brand names, numbers, English loanwords) still makes it Arabic
+        return "ar" if en == 0 and arabic >= _MIN_ARABIC else default
+    return "fr" if fr > en else "en"
+
+
+def detect_language(text: str, default: str = "en") -> str:
+    """Best guess among en/ar/fr; ``default`` when there is no signal."""
+    return _classify(text, len(_ARABIC.findall(text)), _LETTER.findall, default)
+
+
+def detect_languages(texts: Sequence[str], default: str = "en") -> List[str]:
+    """detect_language() for many texts."""
+    # Bound methods skip attribute lookups in the loop
+    find_letters, find_arabic = _LETTER.findall, _ARABIC.findall
+    out = []
+    append = out.append
+    for text in texts:
+        append(_classify(text, len(find_arabic(text)), find_letters, default))
+    return out
+
+
+def partition_by_language(
+    texts: Sequence[str],
+    languages: Optional[Sequence[str]] = None,
+) -> Dict[str, List[int]]:
+    """Indices of ``texts`` grouped by (detected) language, in input order."""
+    if languages is None:
+        languages = detect_languages(texts)
+    groups: Dict[str, List[int]] = {}
+    for i, language in enumerate(languages):
+        groups.setdefault(language, []).append(i)
+    return groups
@@ -0,0 +1,177 @@
+"""Per-stage timing histograms for the inference path.
+
+Stages are timed with ``metrics.timer(stage, batch_size=..., seq_len=...)``
+and aggregated into histograms labelled by stage and by power-of-two
+buckets of batch size and sequence length, so label cardinality stays
+small. ``render_prometheus()`` produces the Prometheus text format served
+at ``GET /metrics``; ``add_hook`` forwards every observation to other
+sinks. While disabled, ``timer`` returns a shared no-op context manager.
+"""
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+
+# Upper bounds in seconds, Prometheus style (cumulative, plus +Inf)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_NAME = "sentiment_stage_seconds"
+
+Hook = Callable[[str, float, Dict[str, str]], None]
+
+_NOOP = nullcontext()
+
+
+def size_bucket(n: int) -> str:
+    """Smallest power of two >= ``n``, as a label value."""
+    return str(1 << max(0, int(n) - 1).bit_length())
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target and n:
+                return bound
+        return float("inf") if self.counts[-1] else 0.0
+
+
+class _Timer:
+    __slots__ = ("registry", "stage", "labels", "started")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str, labels: Dict[str, str]):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._hooks: List[Hook] = []
+
+    def add_hook(self, hook: Hook) -> None:
+        """Call ``hook(stage, seconds, labels)`` on every observation."""
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_hook(self, hook: Hook) -> None:
+        with self._lock:
+            self._hooks.remove(hook)
+
+    def timer(self, stage: str, batch_size: Optional[int] = None, seq_len: Optional[int] = None):
+        """Context manager timing one run of ``stage``."""
+        if not self.enabled:
+            return _NOOP
+        labels = {}
+        if batch_size is not None:
+            labels["batch_size"] = batch_size
+        if seq_len is not None:
+            labels["seq_len"] = seq_len
+        return _Timer(self, stage, labels)
+
+    def observe(
+        self,
+        stage: str,
+        seconds: float,
+        batch_size: Optional[int] = None,
+        seq_len: Optional[int] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        labels = {}
+        if batch_size is not None:
+            labels["batch_size"] = size_bucket(batch_size)
+        if seq_len is not None:
+            labels["seq_len"] = size_bucket(seq_len)
+        key = (stage, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            hooks = list(self._hooks)
+        for hook in hooks:
+            hook(stage, seconds, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def summary(self) -> List[dict]:
+        """Per-stage totals across all label values, for dashboards."""
+        with self._lock:
+            stages: Dict[str, Histogram] = {}
+            for (stage, _), histogram in self._histograms.items():
+                merged = stages.setdefault(stage, Histogram(self.buckets))
+                merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                merged.sum += histogram.sum
+                merged.count += histogram.count
+        return [
+            {
+                "stage": stage,
+                "count": h.count,
+                "total_ms": round(h.sum * 1000, 3),
+                "mean_ms": round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                "p50_ms_le": h.quantile(0.5) * 1000,
+                "p95_ms_le": h.quantile(0.95) * 1000,
+            }
+            for stage, h in sorted(stages.items())
+        ]
+
+    def render_prometheus(self) -> str:
+        """All histograms in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each inference stage.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        with self._lock:
+            items = sorted(self._histograms.items())
+            for (stage, labels), histogram in items:
+                base = [("stage", stage), *labels]
+                cumulative = 0
+                for bound, n in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{METRIC_NAME}_bucket{_format_labels(base + [('le', le)])} {cumulative}")
+                lines.append(f"{METRIC_NAME}_sum{_format_labels(base)} {histogram.sum!r}")
+                lines.append(f"{METRIC_NAME}_count{_format_labels(base)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels) -> str:
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+# Shared by the engines, api.py, the server and the Streamlit app
+metrics = MetricsRegistry()
@@ -0,0 +1,58 @@
+from typing import List, Sequence, Tuple
+import re
+import unicodedata
+
+# Characters that never change what a text says, and variants of quotes
+# that French and pasted text use interchangeably. Applied after NFKC.
+_CANONICAL = str.maketrans(
+    {
+        # Arabic tatweel (kashida) only stretches words
+        "ـ": None,
+        # Zero-width space/joiners, word joiner, BOM
+        **dict.fromkeys(["​", "‌", "‍", "⁠", "﻿"]),
+        # Soft hyphen, left-to-right / right-to-left marks
+        **dict.fromkeys(["­", "‎", "‏"]),
+        # Arabic harakat, superscript alef and Quranic annotation marks
+        **dict.fromkeys(map(chr, range(0x064B, 0x0660))),
+        "ٰ": None,
+        **dict.fromkeys(map(chr, range(0x06D6, 0x06EE))),
+        # Curly / modifier apostrophes (l’hôtel) and curly double quotes
+        **dict.fromkeys(["‘", "’", "‚", "‛", "ʼ", "′"], "'"),
+        **dict.fromkeys(["“", "”", "„", "‟", "″"], '"'),
+    }
+)
+# Cheap pre-check: translate() is only worth calling when one of these occurs
+_NEEDS_TRANSLATE = re.compile("[" + "".join(re.escape(chr(c)) for c in sorted(_CANONICAL)) + "]")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text, used as a lookup and deduplication key.
+
+    Applies NFKC, drops Arabic tatweel and diacritics (harakat) and
+    zero-width characters, straightens curly apostrophes and quotes, trims
+    and collapses runs of whitespace, so trivially different copies of the
+    same input map to the same key. Case is kept: the model is cased.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    if not text.isascii() and _NEEDS_TRANSLATE.search(text):
+        text = text.translate(_CANONICAL)
+    return " ".join(text.split())
+
+
+def dedupe(texts: Sequence[str]) -> Tuple[List[str], List[int]]:
+    """Unique canonical texts in first-seen order, plus each input's index into them.
+
+    ``[unique[i] for i in inverse]`` rebuilds the canonical input, so results
+    computed for ``unique`` fan back out to every original row.
+    """
+    positions = {}
+    unique: List[str] = []
+    inverse: List[int] = []
+    for text in texts:
+        canonical = normalize_text(text)
+        index = positions.get(canonical)
+        if index is None:
+            index = positions[canonical] = len(unique)
+            unique.append(canonical)
+        inverse.append(index)
+    return unique, inverse
@@ -0,0 +1,260 @@
+"""Per-host calibration of torch thread counts and batch size.
+
+Usage::
+
+    python -m src.models.autotune [--latency-ms 250] [--batch-sizes 1,4,8,16,32,64] [--dry-run]
+
+Runs a short sweep on synthetic en/ar/fr texts and keeps the configuration
+with the best throughput whose p95 batch latency stays under the ceiling.
+torch only accepts an inter-op thread count before its first parallel op, so
+each inter-op candidate is measured in a fresh interpreter; intra-op threads
+and batch sizes are swept inside it. ONNX Runtime runs the graph
+sequentially, where its inter-op pool is unused, so for the onnx backend only
+intra-op threads and batch sizes are tuned. The winner is saved to
+``src/helpers/autotune.json`` under this host's name, and load_config()
+merges it between the defaults and config.json on every later start.
+
+With ``"autotune": true`` the servers, the Streamlit app and
+``api.warmup()`` run ensure_profile() at startup, which sweeps when this host
+has no profile yet (or the CPU count or the model changed).
+"""
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from src.helpers.config import DEFAULTS, PROFILE_PATH, PROJECT_ROOT, host_key, load_config, load_profiles
+
+# Settings a profile may set; everything else in it is a record of the sweep
+TUNED_KEYS = ("intra_op_threads", "inter_op_threads", "max_batch_size")
+DEFAULT_BATCH_SIZES = (1, 4, 8, 16, 32, 64)
+DEFAULT_INTER_OP = (1, 2)
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_candidates(cpus: Optional[int] = None) -> List[int]:
+    """Powers of two up to the core count, plus the core count itself."""
+    cpus = cpus or available_cpus()
+    candidates = []
+    threads = 1
+    while threads < cpus:
+        candidates.append(threads)
+        threads *= 2
+    candidates.append(cpus)
+    return candidates
+
+
+def measure(
+    config: dict,
+    intra_op: Sequence[int],
+    batch_sizes: Sequence[int],
+    rounds: int = 3,
+) -> List[dict]:
+    """Throughput and batch latency for every (intra-op threads, batch size) pair.
+
+    Call in a process whose inter-op pool has already been sized.
+    """
+    from src.benchmarks.corpus import synthetic_texts
+    from src.models.loader import create_engine
+
+    cfg = {**config, "intra_op_threads": None, "inter_op_threads": None}
+    torch_backend = cfg.get("backend", "torch") == "torch"
+    engine = create_engine(cfg) if torch_backend else None
+    texts = synthetic_texts(max(batch_sizes) * rounds, seed=1)
+    results = []
+    for threads in intra_op:
+        if torch_backend:
+            import torch
+
+            torch.set_num_threads(threads)
+        else:
+            # ONNX Runtime fixes its pool size when the session is created
+            engine = create_engine({**cfg, "intra_op_threads": threads})
+        for batch_size in batch_sizes:
+            engine.predict_proba(texts[:batch_size], batch_size=batch_size)  # warmup
+            latencies = []
+            for start in range(0, batch_size * rounds, batch_size):
+                started = time.perf_counter()
+                engine.predict_proba(texts[start:start + batch_size], batch_size=batch_size)
+                latencies.append((time.perf_counter() - started) * 1000)
+            results.append({
+                "intra_op_threads": threads,
+                "batch_size": batch_size,
+                "texts_per_second": round(batch_size * len(latencies) / (sum(latencies) / 1000), 2),
+                # Few rounds, so the slowest batch stands in for p95
+                "p95_batch_ms": round(max(latencies), 3),
+            })
+    return results
+
+
+def _untuned(cfg: dict) -> dict:
+    """``cfg`` without settings a saved profile contributed."""
+    return {**cfg, **{key: DEFAULTS[key] for key in TUNED_KEYS}}
+
+
+def _measure_inter_op(
+    config: dict,
+    inter_op: Optional[int],
+    intra_op: Sequence[int],
+    batch_sizes: Sequence[int],
+    rounds: int,
+) -> List[dict]:
+    """measure() in a fresh interpreter with ``inter_op`` inter-op threads."""
+    payload = {
+        "config": config,
+        "inter_op": inter_op,
+        "intra_op": list(intra_op),
+        "batch_sizes": list(batch_sizes),
+        "rounds": rounds,
+    }
+    proc = subprocess.run(
+        [sys.executable, "-m", "src.models.autotune", "--measure", json.dumps(payload, default=str)],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    results = json.loads(proc.stdout.strip().splitlines()[-1])
+    for row in results:
+        row["inter_op_threads"] = inter_op
+    return results
+
+
+def pick_best(results: Sequence[dict], latency_ms: float) -> dict:
+    """Highest throughput under the latency ceiling, else the lowest latency."""
+    within = [r for r in results if r["p95_batch_ms"] <= latency_ms]
+    if within:
+        return max(within, key=lambda r: r["texts_per_second"])
+    return min(results, key=lambda r: r["p95_batch_ms"])
+
+
+def calibrate(
+    config: Optional[dict] = None,
+    latency_ms: Optional[float] = None,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    inter_op: Sequence[int] = DEFAULT_INTER_OP,
+    intra_op: Optional[Sequence[int]] = None,
+    rounds: int = 3,
+) -> dict:
+    """Run the sweep and return a profile (settings plus the measurements)."""
+    from src.models.loader import model_identity
+
+    cfg = config or load_config()
+    latency_ms = latency_ms or cfg.get("autotune_latency_ms", 250.0)
+    cpus = available_cpus()
+    intra_op = list(intra_op or thread_candidates(cpus))
+    if cfg.get("backend", "torch") != "torch":
+        # Only torch has an inter-op pool to size; keep the runtime default
+        inter_op = (None,)
+    results = []
+    for inter in inter_op:
+        results.extend(_measure_inter_op(cfg, inter, intra_op, batch_sizes, rounds))
+    best = pick_best(results, latency_ms)
+    return {
+        "settings": {
+            "intra_op_threads": best["intra_op_threads"],
+            "inter_op_threads": best["inter_op_threads"],
+            "max_batch_size": best["batch_size"],
+        },
+        "cpu_count": cpus,
+        "model": model_identity(cfg),
+        "latency_ms": latency_ms,
+        "texts_per_second": best["texts_per_second"],
+        "p95_batch_ms": best["p95_batch_ms"],
+        "within_latency": best["p95_batch_ms"] <= latency_ms,
+        "tuned_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "measurements": results,
+    }
+
+
+def save_profile(profile: dict, host: Optional[str] = None) -> None:
+    """Store ``profile`` for ``host``, keeping other hosts' entries."""
+    profiles = load_profiles()
+    profiles[host or host_key()] = profile
+    tmp = PROFILE_PATH.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(profiles, indent=2), encoding="utf-8")
+    # Atomic, so processes starting concurrently never read half a file
+    os.replace(tmp, PROFILE_PATH)
+
+
+def is_current(profile: Optional[dict], config: dict) -> bool:
+    """Whether ``profile`` was tuned on this many cores for this model."""
+    from src.models.loader import model_identity
+
+    return (
+        bool(profile)
+        and profile.get("cpu_count") == available_cpus()
+        and profile.get("model") == model_identity(config)
+    )
+
+
+def ensure_profile(force: bool = False) -> Optional[dict]:
+    """Calibrate this host when ``autotune`` is on and its profile is missing or stale."""
+    cfg = load_config()
+    if not (force or cfg.get("autotune")):
+        return None
+    profile = load_profiles().get(host_key())
+    if force or not is_current(profile, cfg):
+        print(f"Calibrating threads and batch size for {host_key()} ...", file=sys.stderr)
+        # Measure without the stale settings, which load_config() merged in
+        profile = calibrate(_untuned(cfg))
+        save_profile(profile)
+    return profile
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Tune torch threads and batch size for this host.")
+    parser.add_argument(
+        "--latency-ms", type=float, default=None, help="p95 batch latency ceiling (default: autotune_latency_ms)."
+    )
+    parser.add_argument("--batch-sizes", default=",".join(map(str, DEFAULT_BATCH_SIZES)), help="Comma-separated batch sizes.")
+    parser.add_argument("--inter-op", default=",".join(map(str, DEFAULT_INTER_OP)), help="Comma-separated inter-op thread counts.")
+    parser.add_argument(
+        "--intra-op", default=None, help="Comma-separated intra-op thread counts (default: powers of two up to the cores)."
+    )
+    parser.add_argument("--rounds", type=int, default=3, help="Timed batches per configuration.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the profile without saving it.")
+    parser.add_argument("--measure", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        # Child of _measure_inter_op(): size the inter-op pool before any torch work
+        payload = json.loads(args.measure)
+        if payload["config"].get("backend", "torch") == "torch":
+            import torch
+
+            torch.set_num_interop_threads(payload["inter_op"])
+        results = measure(payload["config"], payload["intra_op"], payload["batch_sizes"], payload["rounds"])
+        print(json.dumps(results))
+        return
+
+    def ints(value: Optional[str]) -> Optional[List[int]]:
+        return [int(v) for v in value.split(",")] if value else None
+
+    profile = calibrate(
+        _untuned(load_config()),
+        latency_ms=args.latency_ms,
+        batch_sizes=ints(args.batch_sizes),
+        inter_op=ints(args.inter_op),
+        intra_op=ints(args.intra_op),
+        rounds=args.rounds,
+    )
+    summary = {k: v for k, v in profile.items() if k != "measurements"}
+    print(json.dumps(summary, indent=2))
+    if not args.dry_run:
+        save_profile(profile)
+        print(f"Saved to {PROFILE_PATH} for host {host_key()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Compiled-graph fast path for the adapter-merged classifier.
+
+Set ``"fast_path": true`` in the config to load XLM-R with fused
+scaled-dot-product attention (``attn_implementation="sdpa"``) and run its
+forward through ``torch.compile``. Inputs are padded up to a fixed set of
+batch-size and sequence-length buckets, so at most
+``len(BATCH_BUCKETS) x len(SEQ_BUCKETS)`` graphs are ever compiled; larger
+inputs run eagerly. If compilation or a compiled forward fails, or the
+startup parity check against eager drifts past ``fast_path_tolerance``, the
+engine falls back to eager mode for the rest of the process. Measure it
+with::
+
+    python -m src.models.compile [--sample texts.txt]
+
+which prints parity and per-forward latency of eager vs compiled.
+"""
+from typing import Dict, List, Optional, Sequence
+import argparse
+import json
+import sys
+import time
+
+from src.helpers.config import load_config
+from src.models.engine import TorchEngine
+from src.models.parity import SAMPLE_TEXTS, compare_engines, read_sample
+
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+# Finer steps at the short end, where most traffic is
+SEQ_BUCKETS = (16, 32, 48, 64, 96, 128, 192, 256, 384, 512)
+
+
+def bucket(n: int, buckets: Sequence[int]) -> Optional[int]:
+    """Smallest bucket >= ``n``, or None when ``n`` exceeds them all."""
+    for size in buckets:
+        if n <= size:
+            return size
+    return None
+
+
+def _allow_recompiles(count: int) -> None:
+    """Let dynamo keep one graph per shape bucket instead of its default few."""
+    import torch._dynamo
+
+    config = torch._dynamo.config
+    # Renamed to recompile_limit in newer torch releases
+    for name in ("cache_size_limit", "recompile_limit"):
+        if hasattr(config, name):
+            setattr(config, name, max(getattr(config, name), count))
+
+
+class CompiledEngine(TorchEngine):
+    """TorchEngine whose forward runs a ``torch.compile``d model on bucketed shapes."""
+
+    def __init__(self, tokenizer, model):
+        super().__init__(tokenizer, model)
+        self.fallback_reason: Optional[str] = None
+        self.parity: Optional[Dict[str, float]] = None
+        self._compiled = None
+        try:
+            import torch
+
+            _allow_recompiles(len(BATCH_BUCKETS) * len(SEQ_BUCKETS))
+            # Static shapes: each bucket gets its own specialised graph
+            self._compiled = torch.compile(model, dynamic=False)
+        except Exception as exc:
+            self.disable(f"torch.compile unavailable: {exc}")
+
+    @property
+    def compiled(self) -> bool:
+        return self._compiled is not None
+
+    def disable(self, reason: str) -> None:
+        """Run eagerly from now on."""
+        if self.fallback_reason is None:
+            print(f"Fast path disabled, using eager mode: {reason}", file=sys.stderr)
+            self.fallback_reason = reason
+        self._compiled = None
+
+    def forward(self, features: List[dict]):
+        compiled = self._compiled
+        rows = bucket(len(features), BATCH_BUCKETS)
+        seq_len = bucket(max(len(f["input_ids"]) for f in features), SEQ_BUCKETS)
+        if compiled is None or rows is None or seq_len is None:
+            return super().forward(features)
+
+        import torch
+
+        batch = self.tokenizer.pad(features, padding="max_length", max_length=seq_len, return_tensors="pt")
+        extra = rows - len(features)
+        if extra:
+            # Fill the batch bucket with copies of the first row; their
+            # outputs are dropped below
+            batch = {key: torch.cat([value, value[:1].expand(extra, -1)]) for key, value in batch.items()}
+        try:
+            with torch.no_grad():
+                logits = compiled(**batch).logits
+        except Exception as exc:
+            self.disable(f"compiled forward failed: {exc}")
+            return super().forward(features)
+        return logits[: len(features)].float().numpy()
+
+
+def check_fast_path(cfg: dict) -> None:
+    """Raise ValueError when ``cfg`` cannot run the fast path."""
+    if cfg.get("extra_adapters"):
+        raise ValueError("fast_path needs a single merged adapter; remove extra_adapters")
+    if cfg.get("inference_mode", "fp32") != "fp32":
+        raise ValueError("fast_path needs inference_mode 'fp32'")
+
+
+def enable_fast_path(engine: TorchEngine, config: Optional[dict] = None) -> TorchEngine:
+    """Wrap ``engine``'s model in a CompiledEngine and check it against eager.
+
+    The parity check runs the sample texts one at a time, which also
+    compiles the short single-text shapes that dominate live traffic.
+    """
+    cfg = config or load_config()
+    if len(engine.adapters) > 1:
+        raise ValueError("fast_path needs a single merged adapter; remove extra_adapters")
+    check_fast_path(cfg)
+
+    model = engine.model
+    if hasattr(model, "merge_and_unload"):
+        # Compile plain Linear layers, not the LoRA wrappers
+        model = model.merge_and_unload()
+        model.eval()
+    fast = CompiledEngine(engine.tokenizer, model)
+    if not fast.compiled:
+        return fast
+
+    try:
+        fast.parity = compare_engines(TorchEngine(engine.tokenizer, model), fast, SAMPLE_TEXTS, batch_size=1)
+    except Exception as exc:
+        fast.disable(f"parity check failed: {exc}")
+        return fast
+    tolerance = cfg.get("fast_path_tolerance", 1e-3)
+    if fast.parity["label_agreement"] < 1.0 or fast.parity["max_score_delta"] > tolerance:
+        fast.disable(f"parity check drifted past {tolerance}: {fast.parity}")
+    return fast
+
+
+def _forward_ms(engine: TorchEngine, texts: Sequence[str], repeats: int) -> float:
+    """Median per-text latency of single-text predictions, in milliseconds."""
+    samples = []
+    for _ in range(repeats):
+        for text in texts:
+            started = time.perf_counter()
+            engine.predict_proba([text], batch_size=1)
+            samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return round(samples[len(samples) // 2], 3)
+
+
+def benchmark(texts: Optional[Sequence[str]] = None, repeats: int = 5, config: Optional[dict] = None) -> dict:
+    """Parity and single-text latency of the fast path against eager."""
+    from src.models.loader import load_classifier
+
+    cfg = {**(config or load_config()), "fast_path": True, "extra_adapters": {}}
+    texts = list(texts or SAMPLE_TEXTS)
+    tokenizer, model = load_classifier(cfg)
+    fast = enable_fast_path(TorchEngine(tokenizer, model), cfg)
+    eager = TorchEngine(tokenizer, fast.model)
+    # Compile every bucket the sample hits before timing
+    fast.predict_proba(texts, batch_size=1)
+    eager_ms = _forward_ms(eager, texts, repeats)
+    fast_ms = _forward_ms(fast, texts, repeats)
+    return {
+        "compiled": fast.compiled,
+        "fallback_reason": fast.fallback_reason,
+        "attn_implementation": getattr(fast.model.config, "_attn_implementation", None),
+        "parity": fast.parity,
+        "eager_ms": eager_ms,
+        "fast_path_ms": fast_ms,
+        "speedup": round(eager_ms / fast_ms, 2) if fast_ms else None,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare the compiled fast path against eager mode.")
+    parser.add_argument("--sample", default=None, help="Text file with one sample per line.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over the sample.")
+    args = parser.parse_args(argv)
+
+    texts = read_sample(args.sample) if args.sample else None
+    print(json.dumps(benchmark(texts, args.repeats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
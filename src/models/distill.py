@@ -0,0 +1,337 @@
+"""Distil the XLM-R + LoRA classifier into a smaller XLM-R student.
+
+Usage::
+
+    python -m src.models.distill CORPUS [CORPUS ...] [--output artifacts/student] [--holdout held_out.txt]
+    python -m src.models.distill --tiny   # end-to-end smoke run on CPU, no downloads
+
+1. The configured classifier (adapter merged) labels an unlabeled en/ar/fr
+   corpus in batches; texts and teacher probabilities stream to
+   ``teacher_labels.jsonl`` in the output directory, so memory stays flat.
+2. A student with fewer layers and a smaller hidden size is built from the
+   teacher's config. It keeps the teacher's tokenizer, and its embeddings
+   are the teacher's projected onto their top principal components; the
+   encoder layers start from scratch.
+3. The student is trained on the soft labels with a temperature-scaled KL
+   loss, reading the label file again each epoch.
+4. It is saved as a regular Hugging Face checkpoint. The report covers
+   parameter counts, teacher/student label agreement on held-out text and
+   the speedup at batch size 1 and 32.
+
+Serve it with ``"backend": "student"`` (``student_model_dir`` points at the
+output). ``--tiny`` distils the random benchmark model from
+src/benchmarks/tiny_model.py on synthetic texts.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import copy
+import json
+import time
+
+from src.helpers.config import load_config, resolve_path
+from src.helpers.text import normalize_text
+from src.models.parity import SAMPLE_TEXTS, compare_engines, read_sample
+
+LABELS_FILENAME = "teacher_labels.jsonl"
+
+# Student encoder shape: 4 layers at 384 wide is ~1/7 of XLM-R base's
+# encoder compute; TINY_STUDENT matches the tiny benchmark teacher
+STUDENT_ARCHITECTURE = {
+    "num_hidden_layers": 4,
+    "hidden_size": 384,
+    "num_attention_heads": 6,
+    "intermediate_size": 1536,
+}
+TINY_STUDENT = {
+    "num_hidden_layers": 1,
+    "hidden_size": 64,
+    "num_attention_heads": 2,
+    "intermediate_size": 128,
+}
+
+
+def load_teacher(config: Optional[dict] = None):
+    """The configured classifier as an fp32 TorchEngine with the adapter merged."""
+    from src.models.engine import TorchEngine
+    from src.models.loader import load_classifier
+
+    cfg = {**(config or load_config()), "inference_mode": "fp32", "extra_adapters": {}}
+    tokenizer, model = load_classifier(cfg)
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    model.eval()
+    return TorchEngine(tokenizer, model)
+
+
+def label_corpus(teacher, texts: Iterable[str], output_path, batch_size: int = 64, max_length: int = 256) -> int:
+    """Write ``{"text", "probs"}`` lines with the teacher's probabilities; returns the count."""
+    from src.api.bulk import batched
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    canonical = (normalize_text(text) for text in texts)
+    with open(output_path, "w", encoding="utf-8") as out:
+        for batch in batched((text for text in canonical if text), batch_size):
+            probs = teacher.predict(batch, batch_size=batch_size, max_length=max_length).scores.tolist()
+            for text, row in zip(batch, probs):
+                out.write(json.dumps({"text": text, "probs": [round(p, 6) for p in row]}, ensure_ascii=False) + "\n")
+            written += len(batch)
+    return written
+
+
+def read_labels(path) -> Iterator[Tuple[str, List[float]]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["text"], record["probs"]
+
+
+def _principal_components(weight, k: int):
+    """``(hidden, k)`` matrix of the top-``k`` principal directions of ``weight``'s rows."""
+    import torch
+
+    mean = weight.mean(dim=0)
+    # Eigen-decomposing the small hidden x hidden covariance avoids an SVD
+    # (or a centred copy) of the full vocabulary x hidden matrix
+    covariance = weight.T @ weight - len(weight) * torch.outer(mean, mean)
+    eigenvalues, eigenvectors = torch.linalg.eigh(covariance)
+    return eigenvectors[:, eigenvalues.argsort(descending=True)[:k]]
+
+
+def build_student(teacher_model, architecture: Optional[Dict[str, int]] = None, seed: int = 0):
+    """Smaller XLMRobertaForSequenceClassification initialised from ``teacher_model``."""
+    import torch
+    from transformers import XLMRobertaForSequenceClassification
+
+    shape = {**STUDENT_ARCHITECTURE, **(architecture or {})}
+    teacher_config = teacher_model.config
+    if shape["hidden_size"] > teacher_config.hidden_size:
+        raise ValueError(f"Student hidden_size {shape['hidden_size']} exceeds the teacher's {teacher_config.hidden_size}")
+    config = copy.deepcopy(teacher_config)
+    for key, value in shape.items():
+        setattr(config, key, value)
+
+    torch.manual_seed(seed)
+    student = XLMRobertaForSequenceClassification(config)
+    teacher_embeddings = teacher_model.base_model.embeddings
+    student_embeddings = student.base_model.embeddings
+    with torch.no_grad():
+        projection = _principal_components(teacher_embeddings.word_embeddings.weight.float(), shape["hidden_size"])
+        for name in ("word_embeddings", "position_embeddings", "token_type_embeddings"):
+            getattr(student_embeddings, name).weight.copy_(getattr(teacher_embeddings, name).weight.float() @ projection)
+    return student
+
+
+def train_student(
+    student,
+    tokenizer,
+    labels_path,
+    epochs: int = 3,
+    batch_size: int = 32,
+    learning_rate: float = 5e-4,
+    temperature: float = 2.0,
+    max_length: int = 128,
+    seed: int = 0,
+) -> List[float]:
+    """Fit ``student`` to the teacher's soft labels; returns the mean loss per epoch."""
+    import torch
+    from torch.nn import functional as F
+
+    from src.api.bulk import batched
+
+    torch.manual_seed(seed)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate, weight_decay=0.01)
+    student.train()
+    history = []
+    for _ in range(epochs):
+        total, steps = 0.0, 0
+        for batch in batched(read_labels(labels_path), batch_size):
+            texts = [text for text, _ in batch]
+            inputs = tokenizer(texts, padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+            teacher_probs = torch.tensor([probs for _, probs in batch], dtype=torch.float32)
+            # log(p) / T is the teacher's logits / T up to a per-row constant
+            targets = F.softmax(teacher_probs.clamp_min(1e-8).log() / temperature, dim=-1)
+            log_student = F.log_softmax(student(**inputs).logits / temperature, dim=-1)
+            loss = F.kl_div(log_student, targets, reduction="batchmean") * temperature**2
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            total += loss.item()
+            steps += 1
+        history.append(round(total / steps, 6) if steps else 0.0)
+    student.eval()
+    return history
+
+
+def export_student(student, tokenizer, output_dir, config: Optional[dict] = None) -> Path:
+    from src.models.loader import write_source_manifest
+
+    output = resolve_path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    student.save_pretrained(output, safe_serialization=True)
+    tokenizer.save_pretrained(output)
+    # Records the teacher, so the student can stand in as merged_model_dir
+    write_source_manifest(output, config)
+    return output
+
+
+def _seconds_per_text(engine, texts: Sequence[str], batch_size: int, repeats: int = 3) -> float:
+    engine.predict_proba(texts[:batch_size], batch_size=batch_size)  # warmup
+    started = time.perf_counter()
+    for _ in range(repeats):
+        engine.predict_proba(texts, batch_size=batch_size)
+    return (time.perf_counter() - started) / (repeats * len(texts))
+
+
+def compare_speed(teacher, student, texts: Sequence[str]) -> dict:
+    """Per-text latency of both engines and the student's speedup, at batch size 1 and 32."""
+    report = {}
+    for batch_size in (1, 32):
+        teacher_s = _seconds_per_text(teacher, texts, batch_size)
+        student_s = _seconds_per_text(student, texts, batch_size)
+        report[f"batch_{batch_size}"] = {
+            "teacher_ms": round(teacher_s * 1000, 3),
+            "student_ms": round(student_s * 1000, 3),
+            "speedup": round(teacher_s / student_s, 2) if student_s else None,
+        }
+    return report
+
+
+def distill(
+    corpus: Iterable[str],
+    output_dir=None,
+    holdout: Optional[Sequence[str]] = None,
+    config: Optional[dict] = None,
+    architecture: Optional[Dict[str, int]] = None,
+    epochs: int = 3,
+    batch_size: int = 32,
+    learning_rate: float = 5e-4,
+    temperature: float = 2.0,
+    max_length: int = 128,
+) -> dict:
+    """Label ``corpus`` with the teacher, train and export the student, and return a report."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    from src.models.engine import TorchEngine
+
+    cfg = config or load_config()
+    output = resolve_path(output_dir or cfg.get("student_model_dir", "artifacts/student"))
+    teacher = load_teacher(cfg)
+
+    started = time.perf_counter()
+    labeled = label_corpus(teacher, corpus, output / LABELS_FILENAME, batch_size=2 * batch_size, max_length=max_length)
+    labeling_seconds = time.perf_counter() - started
+    if not labeled:
+        raise ValueError("The corpus has no non-empty texts")
+
+    student = build_student(teacher.model, architecture)
+    started = time.perf_counter()
+    losses = train_student(
+        student,
+        teacher.tokenizer,
+        output / LABELS_FILENAME,
+        epochs=epochs,
+        batch_size=batch_size,
+        learning_rate=learning_rate,
+        temperature=temperature,
+        max_length=max_length,
+    )
+    training_seconds = time.perf_counter() - started
+    export_student(student, teacher.tokenizer, output, cfg)
+
+    # Evaluate the exported checkpoint, as the student backend will load it
+    exported = TorchEngine(
+        AutoTokenizer.from_pretrained(output), AutoModelForSequenceClassification.from_pretrained(output).eval()
+    )
+    holdout = list(holdout or SAMPLE_TEXTS)
+    return {
+        "output": str(output),
+        "labeled_texts": labeled,
+        "labeling_seconds": round(labeling_seconds, 2),
+        "training_seconds": round(training_seconds, 2),
+        "epoch_losses": losses,
+        "parameters": {
+            "teacher": sum(p.numel() for p in teacher.model.parameters()),
+            "student": sum(p.numel() for p in student.parameters()),
+        },
+        "architecture": {key: getattr(student.config, key) for key in STUDENT_ARCHITECTURE},
+        "agreement": compare_engines(teacher, exported, holdout),
+        "speed": compare_speed(teacher, exported, holdout),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Distil the classifier into a smaller student model.")
+    parser.add_argument("corpus", nargs="*", help="Unlabeled corpus files: one text per line, or .jsonl/.csv/.tsv.")
+    parser.add_argument("--field", default="text", help="Text field for .jsonl/.csv/.tsv corpora.")
+    parser.add_argument("--holdout", default=None, help="Held-out text file (one per line) for agreement and speed.")
+    parser.add_argument("--output", default=None, help="Output directory (defaults to student_model_dir).")
+    parser.add_argument("--layers", type=int, default=None, help="Student encoder layers.")
+    parser.add_argument("--hidden-size", type=int, default=None, help="Student hidden size.")
+    parser.add_argument("--heads", type=int, default=None, help="Student attention heads.")
+    parser.add_argument("--intermediate-size", type=int, default=None, help="Student feed-forward size.")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=5e-4)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument(
+        "--tiny",
+        action="store_true",
+        help="Distil the local random benchmark model on synthetic texts (CPU smoke run).",
+    )
+    parser.add_argument("--workdir", default="artifacts/bench-model", help="Where --tiny builds its teacher.")
+    args = parser.parse_args(argv)
+
+    config = load_config()
+    architecture = {}
+    if args.tiny:
+        from src.benchmarks.corpus import synthetic_texts
+        from src.benchmarks.tiny_model import build_tiny_model
+
+        config = {**config, **build_tiny_model(resolve_path(args.workdir))}
+        architecture = dict(TINY_STUDENT)
+        corpus = synthetic_texts(2000, seed=2) if not args.corpus else None
+        output = args.output or str(Path(args.workdir) / "student")
+    else:
+        if not args.corpus:
+            parser.error("give at least one corpus file, or --tiny")
+        corpus = None
+        output = args.output
+    if corpus is None:
+        from src.models.prune_vocab import iter_corpus
+
+        corpus = (text for path in args.corpus for text in iter_corpus(path, args.field))
+
+    for key, value in (
+        ("num_hidden_layers", args.layers),
+        ("hidden_size", args.hidden_size),
+        ("num_attention_heads", args.heads),
+        ("intermediate_size", args.intermediate_size),
+    ):
+        if value is not None:
+            architecture[key] = value
+
+    holdout = read_sample(args.holdout) if args.holdout else None
+    report = distill(
+        corpus,
+        output,
+        holdout,
+        config=config,
+        architecture=architecture,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        learning_rate=args.learning_rate,
+        temperature=args.temperature,
+        max_length=args.max_length,
+    )
+    print(json.dumps(report, indent=2))
+    print(f'Serve it with "backend": "student", "student_model_dir": "{report["output"]}"')
+
+
+if __name__ == "__main__":
+    main()
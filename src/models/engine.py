@@ -0,0 +1,257 @@
+"""Inference engines wrapping a tokenizer and a sequence classifier.
+
+An engine turns texts into class probabilities. Backends only differ in
+forward(), which returns a logits array; tokenization, token-budget batching
+and the softmax/argmax over the whole batch are shared, so the PyTorch and
+ONNX Runtime paths return identical shapes. predict() returns a Predictions
+object (a score matrix and label codes) that converts to the API's dicts.
+"""
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+
+from src.helpers.batching import estimate_forward_bytes, plan_batches
+from src.helpers.metrics import metrics
+
+# Name of the adapter configured as ``adapter_model``
+DEFAULT_ADAPTER = "default"
+
+
+def softmax(logits):
+    """Row-wise softmax of a 2-d array."""
+    import numpy as np
+
+    logits = np.asarray(logits, dtype=np.float32)
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class Predictions:
+    """Class probabilities of a batch, kept as arrays until dicts are needed.
+
+    ``scores`` is an ``(n, num_labels)`` float32 matrix and ``labels`` the
+    argmax code of each row.
+    """
+
+    __slots__ = ("scores", "labels", "id2label")
+
+    def __init__(self, scores, id2label: Dict[int, str]):
+        import numpy as np
+
+        self.scores = np.asarray(scores, dtype=np.float32).reshape(-1, len(id2label))
+        self.labels = self.scores.argmax(axis=-1)
+        self.id2label = id2label
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def label_names(self, label_map: Optional[Dict[str, str]] = None) -> List[str]:
+        """Display name of every class, optionally renamed through ``label_map``."""
+        label_map = label_map or {}
+        return [label_map.get(self.id2label[i], self.id2label[i]) for i in range(len(self.id2label))]
+
+    def to_dicts(
+        self,
+        texts: Sequence[str],
+        label_map: Optional[Dict[str, str]] = None,
+        decimals: int = 4,
+    ) -> List[dict]:
+        """``{"input", "sentiment", "scores"}`` per row, as analyze_sentiment returns."""
+        import numpy as np
+
+        names = self.label_names(label_map)
+        # Round in float64 so the dicts hold the same values as round(p, 4)
+        rows = np.round(self.scores.astype(np.float64), decimals).tolist()
+        return [
+            {"input": text, "sentiment": names[code], "scores": dict(zip(names, row))}
+            for text, code, row in zip(texts, self.labels.tolist(), rows)
+        ]
+
+
+class Engine:
+    backend = ""
+    adapters: Tuple[str, ...] = (DEFAULT_ADAPTER,)
+
+    def __init__(self, tokenizer, model_config):
+        self.tokenizer = tokenizer
+        self.id2label = {int(k): v for k, v in model_config.id2label.items()}
+        # Activation-memory estimate used by the optional peak-memory cap
+        self.estimate_bytes = partial(
+            estimate_forward_bytes,
+            hidden_size=getattr(model_config, "hidden_size", 768),
+            intermediate_size=getattr(model_config, "intermediate_size", 3072),
+            num_attention_heads=getattr(model_config, "num_attention_heads", 12),
+        )
+
+    def encode(self, texts: Sequence[str], max_length: int = 512) -> List[dict]:
+        """Tokenize without padding, returning one feature dict per text."""
+        with metrics.timer("tokenize", batch_size=len(texts)):
+            encodings = self.tokenizer(list(texts), truncation=True, max_length=max_length)
+        keys = list(encodings.keys())
+        return [{key: encodings[key][i] for key in keys} for i in range(len(texts))]
+
+    def encode_windows(
+        self, texts: Sequence[str], max_length: int = 512, stride: int = 128
+    ) -> Tuple[List[dict], List[int], List[Tuple[int, int]]]:
+        """Split texts into overlapping token windows.
+
+        Returns the window features, the index of the text each window came
+        from, and each window's ``(start_char, end_char)`` span in that text.
+        Consecutive windows of a text share ``stride`` tokens.
+        """
+        with metrics.timer("tokenize", batch_size=len(texts)):
+            encodings = self.tokenizer(
+                list(texts),
+                truncation=True,
+                max_length=max_length,
+                stride=stride,
+                return_overflowing_tokens=True,
+                return_offsets_mapping=True,
+            )
+        doc_index = list(encodings.pop("overflow_to_sample_mapping"))
+        offsets = encodings.pop("offset_mapping")
+        keys = list(encodings.keys())
+        features = [{key: encodings[key][i] for key in keys} for i in range(len(doc_index))]
+        spans = []
+        for window in offsets:
+            # Special tokens carry an empty (0, 0) span
+            real = [(start, end) for start, end in window if end > start]
+            spans.append((real[0][0], real[-1][1]) if real else (0, 0))
+        return features, doc_index, spans
+
+    def forward(self, features: List[dict]):
+        """Pad ``features`` and return their logits as an ``(n, num_labels)`` array."""
+        raise NotImplementedError
+
+    def use_adapter(self, adapter: Optional[str]):
+        """Context manager making ``adapter`` (None for the default) active for forward()."""
+        if adapter not in (None, DEFAULT_ADAPTER):
+            raise ValueError(f"Unknown adapter {adapter!r}; loaded: {', '.join(self.adapters)}")
+        return nullcontext()
+
+    def score_probs(
+        self,
+        features: List[dict],
+        batch_size: int = 32,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ):
+        """Class probabilities of encoded features as an ``(n, num_labels)`` array.
+
+        Features are sorted by length and packed so that ``batch_size *
+        padded_len`` stays within ``max_batch_tokens`` and the estimated
+        activation memory within ``max_batch_bytes`` (both optional). All
+        batches run with ``adapter`` active. Logits are gathered back into
+        input order and normalised with one softmax over the whole matrix.
+        """
+        import numpy as np
+
+        lengths = [len(f["input_ids"]) for f in features]
+        logits = np.empty((len(features), len(self.id2label)), dtype=np.float32)
+        batches = plan_batches(
+            lengths,
+            batch_size,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_bytes=max_batch_bytes,
+            estimate_bytes=self.estimate_bytes,
+        )
+        with self.use_adapter(adapter):
+            for batch in batches:
+                # Sorted longest first, so the first index sets the padded length
+                with metrics.timer("forward", batch_size=len(batch), seq_len=lengths[batch[0]]):
+                    logits[batch] = self.forward([features[i] for i in batch])
+        return softmax(logits)
+
+    def score_features(
+        self,
+        features: List[dict],
+        batch_size: int = 32,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ) -> List[List[float]]:
+        """score_probs() as nested lists."""
+        return self.score_probs(
+            features,
+            batch_size,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_bytes=max_batch_bytes,
+            adapter=adapter,
+        ).tolist()
+
+    def predict(
+        self,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        max_length: int = 512,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ) -> Predictions:
+        """Score texts in token-budgeted batches, in input order."""
+        probs = self.score_probs(
+            self.encode(texts, max_length=max_length),
+            batch_size,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_bytes=max_batch_bytes,
+            adapter=adapter,
+        )
+        return Predictions(probs, self.id2label)
+
+    def predict_proba(
+        self,
+        texts: Sequence[str],
+        batch_size: int = 32,
+        max_length: int = 512,
+        max_batch_tokens: Optional[int] = None,
+        max_batch_bytes: Optional[int] = None,
+        adapter: Optional[str] = None,
+    ) -> List[List[float]]:
+        """predict() scores as nested lists."""
+        return self.predict(
+            texts,
+            batch_size,
+            max_length=max_length,
+            max_batch_tokens=max_batch_tokens,
+            max_batch_bytes=max_batch_bytes,
+            adapter=adapter,
+        ).scores.tolist()
+
+
+class TorchEngine(Engine):
+    backend = "torch"
+
+    def __init__(self, tokenizer, model):
+        super().__init__(tokenizer, model.config)
+        self.model = model
+        # A PeftModel may carry several LoRA adapters over one base model
+        peft_config = getattr(model, "peft_config", None)
+        if peft_config:
+            self.adapters = tuple(peft_config)
+        self._adapter_lock = threading.Lock()
+
+    def use_adapter(self, adapter: Optional[str]):
+        if len(self.adapters) == 1:
+            return super().use_adapter(adapter)
+        adapter = adapter or DEFAULT_ADAPTER
+        if adapter not in self.adapters:
+            raise ValueError(f"Unknown adapter {adapter!r}; loaded: {', '.join(self.adapters)}")
+        return self._activate(adapter)
+
+    @contextmanager
+    def _activate(self, adapter: str):
+        # Only one adapter is active on the shared model at a time, so
+        # requests for different adapters take turns
+        with self._adapter_lock:
+            if self.model.active_adapter != adapter:
+                self.model.set_adapter(adapter)
+            yield
+
+    def forward(self, features: List[dict]):
+        import torch
+
+        batch = self.tokenizer.pad(features, return_tensors="pt")
+        with torch.no_grad():
+            return self.model(**batch).logits.float().numpy()
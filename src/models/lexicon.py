@@ -0,0 +1,171 @@
+"""Precompiled rule-based sentiment scorer for en/ar/fr.
+
+Each language's lexicon is compiled once into a single trie-factored regex
+with a positive and a negative group, so one scan of the text finds every
+entry, including multi-word phrases ("je déteste") and Arabic words carrying
+clitics ("والسعيد", "جميلة"). A first-character lookahead lets the regex
+engine skip most positions without trying any alternative.
+"""
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
+import re
+
+LEXICON: Dict[str, Dict[str, Set[str]]] = {
+    "en": {
+        "pos": {
+            "good",
+            "great",
+            "excellent",
+            "love",
+            "amazing",
+            "happy",
+            "awesome",
+            "wonderful",
+            "nice",
+            "like",
+        },
+        "neg": {
+            "bad",
+            "terrible",
+            "awful",
+            "hate",
+            "sad",
+            "horrible",
+            "worst",
+            "disappoint",
+            "poor",
+            "angry",
+        },
+    },
+    "ar": {
+        "pos": {"جيد", "رائع", "ممتاز", "أحب", "سعيد", "جميل", "مذهل", "لطيف"},
+        "neg": {"سيئ", "فظيع", "كريه", "أكره", "حزين", "مزري", "أسوأ", "مخيب", "رديء", "غاضب"},
+    },
+    "fr": {
+        "pos": {"bon", "génial", "excellent", "j'aime", "heureux", "incroyable", "agréable", "super"},
+        "neg": {"mauvais", "terrible", "affreux", "je déteste", "triste", "horrible", "pire", "décevant", "pauvre", "fâché"},
+    },
+}
+
+# Arabic proclitics (wa/fa, bi/ka/li, the article) and common suffixes
+# (feminine ta marbuta, pronouns, plurals) that attach to lexicon words
+_AR_PREFIX = r"(?:[وف])?(?:لل|[بكل])?(?:ال)?"
+_AR_PREFIX_CHARS = "وفلبكا"
+_AR_SUFFIX = r"(?:ها|هم|هن|كم|نا|ات|ون|ين|ان|ة|ه|ك|ي)?"
+
+
+def _trie_pattern(phrases: Sequence[str]) -> str:
+    """Regex matching any of ``phrases``, factored on shared prefixes."""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in " ".join(phrase.split()):
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items())
+            if ch
+        ]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+def _compile(language: str, entries: Dict[str, Set[str]]) -> "re.Pattern":
+    first_chars = {p[0] for polarity in ("pos", "neg") for p in entries[polarity] if p}
+    groups = []
+    for polarity in ("pos", "neg"):
+        alternation = _trie_pattern(entries[polarity])
+        if language == "ar":
+            alternation = f"{_AR_PREFIX}{alternation}{_AR_SUFFIX}"
+        groups.append(f"({alternation})")
+    if language == "ar":
+        first_chars |= set(_AR_PREFIX_CHARS)
+    lookahead = "[" + "".join(re.escape(c) for c in sorted(first_chars)) + "]"
+    return re.compile(rf"(?<!\w)(?={lookahead})(?:" + "|".join(groups) + r")(?!\w)")
+
+
+def label_from_counts(pos: int, neg: int) -> Tuple[str, float]:
+    if pos == neg:
+        return "neutral", 0.5
+    if pos > neg:
+        score = min(1.0, 0.5 + (pos - neg) * 0.1)
+        return "positive", score
+    score = min(1.0, 0.5 + (neg - pos) * 0.1)
+    return "negative", score
+
+
+def is_unambiguous(pos: int, neg: int, threshold: float) -> bool:
+    """True when only one polarity matched and its score reaches ``threshold``."""
+    if (pos == 0) == (neg == 0):
+        return False
+    return label_from_counts(pos, neg)[1] >= threshold
+
+
+class LexiconScorer:
+    def __init__(self, lexicon: Optional[Dict[str, Dict[str, Set[str]]]] = None):
+        lexicon = lexicon or LEXICON
+        self._patterns = {lang: _compile(lang, entries) for lang, entries in lexicon.items()}
+
+    def _pattern(self, language: Optional[str]) -> "re.Pattern":
+        return self._patterns.get((language or "en").lower(), self._patterns["en"])
+
+    def counts(self, text: str, language: Optional[str]) -> Tuple[int, int]:
+        """Number of distinct positive and negative entries found in ``text``."""
+        found = self._pattern(language).findall(text.lower())
+        if not found:
+            return 0, 0
+        found = set(found)
+        pos = sum(1 for p, _ in found if p)
+        return pos, len(found) - pos
+
+    def _counts_one_language(self, texts: Sequence[str], language: Optional[str]) -> List[Tuple[int, int]]:
+        # Bind the compiled pattern once for the whole batch
+        findall = self._pattern(language).findall
+        out = []
+        append = out.append
+        for text in texts:
+            found = findall(text.lower())
+            if found:
+                found = set(found)
+                pos = sum(1 for p, _ in found if p)
+                append((pos, len(found) - pos))
+            else:
+                append((0, 0))
+        return out
+
+    def counts_batch(
+        self,
+        texts: Sequence[str],
+        languages: Union[str, Sequence[Optional[str]], None] = None,
+    ) -> List[Tuple[int, int]]:
+        """counts() for many texts; ``languages`` is one code for all or one per text."""
+        if languages is None or isinstance(languages, str):
+            return self._counts_one_language(texts, languages)
+
+        groups: Dict[str, List[int]] = {}
+        for i, lang in enumerate(languages):
+            key = (lang or "en").lower()
+            groups.setdefault(key if key in self._patterns else "en", []).append(i)
+
+        results: List[Tuple[int, int]] = [(0, 0)] * len(texts)
+        for lang, indices in groups.items():
+            for i, counts in zip(indices, self._counts_one_language([texts[i] for i in indices], lang)):
+                results[i] = counts
+        return results
+
+    def predict(self, text: str, language: Optional[str]) -> Tuple[str, float]:
+        return label_from_counts(*self.counts(text, language))
+
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        languages: Union[str, Sequence[Optional[str]], None] = None,
+    ) -> List[Tuple[str, float]]:
+        """Score many texts; ``languages`` is one code for all or one per text."""
+        return [label_from_counts(pos, neg) for pos, neg in self.counts_batch(texts, languages)]
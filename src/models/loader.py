@@ -0,0 +1,266 @@
+"""Loading of the XLM-R + LoRA sentiment classifier.
+
+The adapter can be merged into the base weights once with::
+
+    python -m src.models.loader build [--output artifacts/merged]
+
+which writes a self-contained safetensors checkpoint plus tokenizer files
+and a ``source.json`` manifest naming the base model and adapter it was
+merged from. load_classifier() prefers that artifact when its manifest
+matches the configured models and otherwise falls back to loading the base
+model and wrapping it with the PEFT adapter.
+"""
+from pathlib import Path
+from typing import Optional, Tuple
+import argparse
+import hashlib
+import json
+import sys
+
+from src.helpers.config import load_config, resolve_path
+
+
+# Written next to a merged artifact; records what it was merged from
+MANIFEST_NAME = "source.json"
+_warned_stale = set()
+
+
+def has_merged_artifact(path) -> bool:
+    path = Path(path)
+    return (path / "config.json").exists() and (path / "model.safetensors").exists()
+
+
+def source_manifest(config: Optional[dict] = None) -> dict:
+    """The base model and adapter a merged artifact built from ``config`` comes from."""
+    cfg = config or load_config()
+    manifest = {k: cfg.get(k) for k in ("base_model", "adapter_model", "num_labels")}
+    # Local checkpoints retrained in place keep their name, so hash their files
+    files = {name: _fingerprint(resolve_path(cfg[name])) for name in ("base_model", "adapter_model") if cfg.get(name)}
+    data = json.dumps(files, sort_keys=True, default=str).encode("utf-8")
+    manifest["files"] = hashlib.sha256(data).hexdigest()[:16]
+    return manifest
+
+
+def write_source_manifest(output_dir, config: Optional[dict] = None) -> None:
+    Path(output_dir, MANIFEST_NAME).write_text(json.dumps(source_manifest(config), indent=2), encoding="utf-8")
+
+
+def merged_artifact_path(config: Optional[dict] = None) -> Optional[Path]:
+    """``merged_model_dir`` if it holds an artifact merged from the configured models.
+
+    Artifacts without a manifest, or merged from another base model or
+    adapter, are ignored with a warning so a stale build is never served.
+    """
+    cfg = config or load_config()
+    if not cfg.get("merged_model_dir") or cfg.get("extra_adapters"):
+        return None
+    path = resolve_path(cfg["merged_model_dir"])
+    if not has_merged_artifact(path):
+        return None
+    try:
+        manifest = json.loads((path / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if manifest == source_manifest(cfg):
+        return path
+    if path not in _warned_stale:
+        _warned_stale.add(path)
+        print(
+            f"Ignoring the merged model in {path}: it was not built from the configured "
+            "base_model/adapter_model; rebuild it with `python -m src.models.loader build`",
+            file=sys.stderr,
+        )
+    return None
+
+
+def _load_sequence_classifier(path, cfg: dict, **kwargs):
+    """from_pretrained(), asking for fused SDPA attention when ``fast_path`` is on."""
+    from transformers import AutoModelForSequenceClassification
+
+    if cfg.get("fast_path"):
+        try:
+            return AutoModelForSequenceClassification.from_pretrained(path, attn_implementation="sdpa", **kwargs)
+        except (TypeError, ValueError) as exc:
+            # Older transformers releases have no SDPA path for XLM-R
+            print(f"SDPA attention unavailable, using the default: {exc}", file=sys.stderr)
+    return AutoModelForSequenceClassification.from_pretrained(path, **kwargs)
+
+
+def _load_adapter_model(cfg: dict):
+    from transformers import AutoTokenizer
+    from peft import PeftModel
+
+    tokenizer = AutoTokenizer.from_pretrained(cfg["base_model"])
+    base = _load_sequence_classifier(cfg["base_model"], cfg, num_labels=cfg["num_labels"])
+    model = PeftModel.from_pretrained(base, cfg["adapter_model"])
+    # Extra adapters share the base weights; each adds only its LoRA matrices
+    # and classifier head
+    for name, adapter in (cfg.get("extra_adapters") or {}).items():
+        model.load_adapter(adapter, adapter_name=name)
+    return tokenizer, model
+
+
+def load_classifier(config: Optional[dict] = None) -> Tuple[object, object]:
+    """Return ``(tokenizer, model)`` ready for inference.
+
+    Uses the merged artifact in ``merged_model_dir`` when it was built from
+    the configured models, otherwise the base model plus LoRA adapter. With ``inference_mode`` set to
+    ``"int8"`` the adapter is merged and linear layers are quantized.
+    ``extra_adapters`` are loaded next to the default adapter on the
+    unmerged base model, so they rule out the merged artifact and int8.
+    """
+    cfg = config or load_config()
+    extra_adapters = cfg.get("extra_adapters")
+    if extra_adapters and cfg.get("inference_mode", "fp32") != "fp32":
+        raise ValueError("extra_adapters need inference_mode 'fp32'; int8 merges the adapter into the weights")
+    path = merged_artifact_path(cfg)
+    if path is not None:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(path)
+        model = _load_sequence_classifier(path, cfg)
+    else:
+        tokenizer, model = _load_adapter_model(cfg)
+    model.eval()
+
+    if cfg.get("inference_mode", "fp32") == "int8":
+        from src.models.quantize import quantize_dynamic_int8
+
+        model = quantize_dynamic_int8(model)
+    return tokenizer, model
+
+
+def load_student(config: Optional[dict] = None) -> Tuple[object, object]:
+    """Return ``(tokenizer, model)`` of the distilled student in ``student_model_dir``."""
+    from transformers import AutoTokenizer
+
+    cfg = config or load_config()
+    if cfg.get("extra_adapters"):
+        raise ValueError("extra_adapters are not supported by the student backend")
+    path = resolve_path(cfg["student_model_dir"])
+    if not has_merged_artifact(path):
+        raise FileNotFoundError(f"No student model in {path}; run `python -m src.models.distill` first")
+    tokenizer = AutoTokenizer.from_pretrained(path)
+    model = _load_sequence_classifier(path, cfg)
+    model.eval()
+    if cfg.get("inference_mode", "fp32") == "int8":
+        from src.models.quantize import quantize_dynamic_int8
+
+        model = quantize_dynamic_int8(model)
+    return tokenizer, model
+
+
+def apply_thread_settings(cfg: dict) -> None:
+    """Size torch's thread pools from ``intra_op_threads`` / ``inter_op_threads``."""
+    intra, inter = cfg.get("intra_op_threads"), cfg.get("inter_op_threads")
+    if not intra and not inter:
+        return
+    import torch
+
+    if intra:
+        torch.set_num_threads(int(intra))
+    if inter:
+        try:
+            torch.set_num_interop_threads(int(inter))
+        except RuntimeError:
+            # Only allowed before any inter-op work has run in this process
+            pass
+
+
+def create_engine(config: Optional[dict] = None):
+    """Build the inference engine for the configured ``backend``."""
+    cfg = config or load_config()
+    backend = cfg.get("backend", "torch")
+    if backend == "onnx":
+        from src.models.onnx_backend import OnnxEngine
+
+        if cfg.get("extra_adapters"):
+            raise ValueError("extra_adapters are only supported by the torch backend")
+        return OnnxEngine(
+            resolve_path(cfg["onnx_model_dir"]),
+            intra_op_threads=cfg.get("intra_op_threads"),
+            inter_op_threads=cfg.get("inter_op_threads"),
+        )
+    if backend not in ("torch", "student"):
+        raise ValueError(f"Unknown backend: {backend!r}")
+
+    from src.models.engine import TorchEngine
+
+    apply_thread_settings(cfg)
+    if backend == "student":
+        engine = TorchEngine(*load_student(cfg))
+    else:
+        engine = TorchEngine(*load_classifier(cfg))
+    if cfg.get("fast_path"):
+        from src.models.compile import enable_fast_path
+
+        engine = enable_fast_path(engine, cfg)
+    return engine
+
+
+def _fingerprint(path) -> list:
+    """Name, size and mtime of every file under a local model directory."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    return [(str(p.relative_to(path)) if p != path else p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in files]
+
+
+def model_identity(config: Optional[dict] = None) -> str:
+    """Stable hash of what the configured engine would load.
+
+    Covers the model names plus the files of any local artifact it uses, so
+    rebuilding the merged or ONNX artifact yields a new identity.
+    """
+    cfg = config or load_config()
+    fields = {
+        k: cfg.get(k)
+        for k in ("backend", "base_model", "adapter_model", "extra_adapters", "num_labels", "inference_mode")
+    }
+    if cfg.get("backend", "torch") == "onnx":
+        fields["artifact"] = _fingerprint(resolve_path(cfg["onnx_model_dir"]))
+    elif cfg.get("backend") == "student":
+        fields["artifact"] = _fingerprint(resolve_path(cfg["student_model_dir"]))
+    elif merged_artifact_path(cfg) is not None:
+        fields["artifact"] = _fingerprint(merged_artifact_path(cfg))
+    else:
+        for name in ("base_model", "adapter_model"):
+            # Local checkpoints (as opposed to hub ids) are fingerprinted too
+            if cfg.get(name):
+                fields[f"{name}_files"] = _fingerprint(resolve_path(cfg[name]))
+        for name, adapter in sorted((cfg.get("extra_adapters") or {}).items()):
+            fields[f"extra_adapter_{name}_files"] = _fingerprint(resolve_path(adapter))
+    data = json.dumps(fields, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def build_merged_artifact(output_dir=None, config: Optional[dict] = None) -> Path:
+    """Merge the LoRA adapter into the base weights and save it to disk."""
+    # Only the default adapter is merged
+    cfg = {**(config or load_config()), "extra_adapters": {}}
+    output = resolve_path(output_dir or cfg["merged_model_dir"])
+    tokenizer, model = _load_adapter_model(cfg)
+    model = model.merge_and_unload()
+    model.eval()
+    output.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(output, safe_serialization=True)
+    tokenizer.save_pretrained(output)
+    write_source_manifest(output, cfg)
+    return output
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Model artifact tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Merge the LoRA adapter into the base model and save it.")
+    build.add_argument("--output", default=None, help="Output directory (defaults to merged_model_dir).")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        path = build_merged_artifact(args.output)
+        print(f"Merged model written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""ONNX Runtime backend for the sentiment classifier.
+
+Export the adapter-merged classifier once with::
+
+    python -m src.models.onnx_backend export [--output artifacts/onnx]
+
+then set ``"backend": "onnx"`` in the config. analyze_sentiment() and
+SentimentPipeline.predict() will run through ONNX Runtime instead of
+PyTorch; serving this way only needs ``onnxruntime`` and ``transformers``.
+"""
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import json
+
+from src.helpers.config import load_config, resolve_path
+from src.models.engine import Engine
+from src.models.parity import SAMPLE_TEXTS, compare_engines
+
+ONNX_FILENAME = "model.onnx"
+
+
+def has_onnx_artifact(path) -> bool:
+    return (Path(path) / ONNX_FILENAME).exists()
+
+
+class OnnxEngine(Engine):
+    backend = "onnx"
+
+    def __init__(self, model_dir, intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        model_dir = Path(model_dir)
+        if not has_onnx_artifact(model_dir):
+            raise FileNotFoundError(
+                f"No {ONNX_FILENAME} in {model_dir}; run `python -m src.models.onnx_backend export` first"
+            )
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 lets ONNX Runtime pick
+        options.intra_op_num_threads = intra_op_threads or 0
+        options.inter_op_num_threads = inter_op_threads or 0
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_FILENAME), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = [i.name for i in self.session.get_inputs()]
+        super().__init__(AutoTokenizer.from_pretrained(model_dir), AutoConfig.from_pretrained(model_dir))
+
+    def forward(self, features: List[dict]):
+        import numpy as np
+
+        batch = self.tokenizer.pad(features, return_tensors="np")
+        inputs = {name: batch[name].astype(np.int64) for name in self._input_names}
+        return self.session.run(None, inputs)[0]
+
+
+def export_onnx(output_dir=None, config: Optional[dict] = None, opset: int = 17) -> Path:
+    """Export the adapter-merged classifier to ONNX with dynamic batch/sequence axes."""
+    import torch
+    from src.models.loader import load_classifier
+
+    cfg = {**(config or load_config()), "inference_mode": "fp32"}
+    output = resolve_path(output_dir or cfg["onnx_model_dir"])
+    tokenizer, model = load_classifier(cfg)
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    model.eval()
+
+    class LogitsOnly(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).logits
+
+    dummy = tokenizer(["Hello world", "مرحبا بالعالم، كيف الحال؟"], padding=True, return_tensors="pt")
+    output.mkdir(parents=True, exist_ok=True)
+    torch.onnx.export(
+        LogitsOnly(model),
+        (dummy["input_ids"], dummy["attention_mask"]),
+        str(output / ONNX_FILENAME),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=opset,
+    )
+    tokenizer.save_pretrained(output)
+    model.config.save_pretrained(output)
+    return output
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="ONNX export tools.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Export the merged classifier to ONNX.")
+    export.add_argument("--output", default=None, help="Output directory (defaults to onnx_model_dir).")
+    export.add_argument("--opset", type=int, default=17)
+    export.add_argument("--no-check", action="store_true", help="Skip the PyTorch/ONNX parity check.")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        path = export_onnx(args.output, opset=args.opset)
+        print(f"ONNX model written to {path}")
+        if not args.no_check:
+            from src.models.engine import TorchEngine
+            from src.models.loader import load_classifier
+
+            reference = TorchEngine(*load_classifier({**load_config(), "inference_mode": "fp32"}))
+            print(json.dumps(compare_engines(reference, OnnxEngine(path), SAMPLE_TEXTS), indent=2))
+
+
+if __name__ == "__main__":
+    main()
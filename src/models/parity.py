@@ -0,0 +1,39 @@
+"""Prediction parity checks between two engines."""
+from typing import Dict, Sequence
+
+# Small trilingual sample used when no sample file is given
+SAMPLE_TEXTS = [
+    "I absolutely love this product. It's amazing!",
+    "The delivery was late and the box was damaged.",
+    "It's okay, nothing special.",
+    "Worst customer service I have ever dealt with.",
+    "هذا المنتج رائع جدًا وأنا سعيد به.",
+    "الخدمة سيئة جدا ولن أعود مرة أخرى.",
+    "وصل الطلب اليوم.",
+    "Ce service est terrible, je suis déçu.",
+    "J'adore ce film, il est génial !",
+    "Le colis est arrivé mardi.",
+]
+
+
+def compare_engines(reference, candidate, texts: Sequence[str] = SAMPLE_TEXTS, batch_size: int = 16) -> Dict[str, float]:
+    """Report how closely ``candidate`` reproduces ``reference`` on ``texts``."""
+    ref = reference.predict_proba(texts, batch_size=batch_size)
+    cand = candidate.predict_proba(texts, batch_size=batch_size)
+    agree = 0
+    max_delta = 0.0
+    for r, c in zip(ref, cand):
+        if max(range(len(r)), key=r.__getitem__) == max(range(len(c)), key=c.__getitem__):
+            agree += 1
+        max_delta = max(max_delta, max(abs(a - b) for a, b in zip(r, c)))
+    return {
+        "samples": len(ref),
+        "label_agreement": agree / len(ref) if ref else 1.0,
+        "max_score_delta": max_delta,
+    }
+
+
+def read_sample(path) -> list:
+    """Read one sample text per non-empty line."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
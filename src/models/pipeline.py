@@ -1,101 +1,198 @@
-from typing import Tuple
-import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import threading
+
+from src.helpers.language import detect_language, detect_languages
+from src.helpers.text import dedupe, normalize_text
+from src.models.lexicon import LexiconScorer, is_unambiguous, label_from_counts
 
 
 class SentimentPipeline:
     def __init__(self, config: dict):
         self.config = config
-        self.pipe = None
+        self.engine = None
+        # Compiled once; used when the transformer engine is unavailable and
+        # as the fast first stage of the cascade
+        self.lexicon = LexiconScorer()
+        self.cascade = bool(config.get("cascade_enabled", False))
+        self.cascade_threshold = float(config.get("cascade_threshold", 0.7))
+        self._stats_lock = threading.Lock()
+        self._stats = {"lexicon": 0, "model": 0}
         self._init_model()
 
     def _init_model(self) -> None:
-        """Initialize a transformers sentiment-analysis pipeline if available.
+        """Attach the shared inference engine (PyTorch or ONNX) if available.
 
         Falls back to a lightweight rule-based approach if transformers or
         the configured model is unavailable.
         """
         if self.config.get("use_transformers", True):
             try:
-                from transformers import pipeline as hf_pipeline
-                model_name = self.config.get("model_name")
-                self.pipe = hf_pipeline("sentiment-analysis", model=model_name)
+                from src.models.registry import get_engine
+
+                # Share the process-wide model with api.py and main.py
+                self.engine = get_engine(self.config)
             except Exception:
-                # Keep self.pipe as None to enable rule-based fallback
-                self.pipe = None
+                # Keep self.engine as None to enable rule-based fallback
+                self.engine = None
 
-    def predict(self, text: str, language: str) -> Tuple[str, float]:
-        text = text.strip()
+    def predict(self, text: str, language: Optional[str] = None) -> Tuple[str, float]:
+        """Label and score for ``text``; ``language`` is detected when omitted."""
+        text = normalize_text(text)
         if not text:
             return "neutral", 0.0
 
-        # Use transformers pipeline if available
-        if self.pipe is not None:
-            res = self.pipe(text)[0]
-            label = str(res.get("label", "")).lower()
-            score = float(res.get("score", 0.0))
-
-            # Normalize label to positive/neutral/negative if possible
-            if label in ("positive", "negative", "neutral"):
-                return label, score
-
-            mapping = self.config.get(
-                "label_mapping",
-                {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"},
-            )
-            return mapping.get(res.get("label", ""), "neutral"), score
+        # Use the transformer engine if available
+        if self.engine is not None:
+            return self.predict_batch([text], language)[0]
 
         # Fallback to rule-based per-language lexicon
         return self._rule_based(text, language)
 
-    def _rule_based(self, text: str, language: str) -> Tuple[str, float]:
-        lex = {
-            "en": {
-                "pos": {
-                    "good",
-                    "great",
-                    "excellent",
-                    "love",
-                    "amazing",
-                    "happy",
-                    "awesome",
-                    "wonderful",
-                    "nice",
-                    "like",
-                },
-                "neg": {
-                    "bad",
-                    "terrible",
-                    "awful",
-                    "hate",
-                    "sad",
-                    "horrible",
-                    "worst",
-                    "disappoint",
-                    "poor",
-                    "angry",
-                },
-            },
-            "ar": {
-                "pos": {"جيد", "رائع", "ممتاز", "أحب", "سعيد", "جميل", "مذهل", "لطيف"},
-                "neg": {"سيئ", "فظيع", "كريه", "أكره", "حزين", "مزري", "أسوأ", "مخيب", "رديء", "غاضب"},
-            },
-            "fr": {
-                "pos": {"bon", "génial", "excellent", "j'aime", "heureux", "incroyable", "agréable", "super"},
-                "neg": {"mauvais", "terrible", "affreux", "je déteste", "triste", "horrible", "pire", "décevant", "pauvre", "fâché"},
-            },
+    def predict_batch(
+        self,
+        texts: Sequence[str],
+        language: Union[str, Sequence[Optional[str]], None] = None,
+    ) -> List[Tuple[str, float]]:
+        """Predict many texts at once; ``language`` is one code or one per text.
+
+        Languages are detected per text when ``language`` is omitted, and for
+        any ``None`` entries of a per-text list. Texts are canonicalized with
+        normalize_text() and each distinct form is scored once (per language,
+        when languages are given per text).
+        """
+        if language is None or isinstance(language, str):
+            unique, inverse = dedupe(texts)
+            scored = self._predict_unique(unique, language)
+            return [scored[i] for i in inverse]
+
+        # Rows sharing a text but given different languages are kept apart
+        positions: Dict[Tuple[str, Optional[str]], int] = {}
+        unique, unique_language, inverse = [], [], []
+        for text, lang in zip(texts, language):
+            key = (normalize_text(text), lang)
+            index = positions.get(key)
+            if index is None:
+                index = positions[key] = len(unique)
+                unique.append(key[0])
+                unique_language.append(lang)
+            inverse.append(index)
+        scored = self._predict_unique(unique, unique_language)
+        return [scored[i] for i in inverse]
+
+    def _predict_unique(
+        self,
+        texts: List[str],
+        language: Union[str, Sequence[Optional[str]], None],
+    ) -> List[Tuple[str, float]]:
+        results: List[Tuple[str, float]] = [("neutral", 0.0)] * len(texts)
+        todo = [i for i, t in enumerate(texts) if t]
+        if not todo:
+            return results
+
+        if self.engine is None:
+            pending = [texts[i] for i in todo]
+            for i, res in zip(todo, self.lexicon.predict_batch(pending, self._languages(pending, language, todo))):
+                results[i] = res
+            return results
+
+        escalate = todo
+        if self.cascade:
+            # Stage 1: texts with strong, one-sided lexicon evidence skip the model
+            escalate = []
+            pending = [texts[i] for i in todo]
+            # Only the lexicon needs languages; the model is multilingual
+            counts = self.lexicon.counts_batch(pending, self._languages(pending, language, todo))
+            for i, (pos, neg) in zip(todo, counts):
+                if is_unambiguous(pos, neg, self.cascade_threshold):
+                    results[i] = label_from_counts(pos, neg)
+                else:
+                    escalate.append(i)
+
+        # Stage 2: everything else goes through the transformer
+        if escalate:
+            rows = self.engine.predict_proba([texts[i] for i in escalate])
+            for i, probs in zip(escalate, rows):
+                results[i] = self._from_probs(probs)
+        with self._stats_lock:
+            self._stats["lexicon"] += len(todo) - len(escalate)
+            self._stats["model"] += len(escalate)
+        return results
+
+    def cascade_stats(self) -> Dict[str, float]:
+        """Per-stage counters of texts answered by the lexicon vs the model."""
+        with self._stats_lock:
+            total = self._stats["lexicon"] + self._stats["model"]
+            return {
+                **self._stats,
+                "total": total,
+                "lexicon_share": self._stats["lexicon"] / total if total else 0.0,
+            }
+
+    def evaluate_cascade(
+        self,
+        texts: Sequence[str],
+        language: Union[str, Sequence[Optional[str]], None] = None,
+        threshold: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Measure the cascade's accuracy cost against the model alone.
+
+        Runs both stages on every text (counters are not touched) and reports
+        the share of texts the lexicon would answer and how often its label
+        agrees with the model's on those texts.
+        """
+        if self.engine is None:
+            raise RuntimeError("evaluate_cascade needs the transformer engine")
+        threshold = self.cascade_threshold if threshold is None else threshold
+        canonical = [normalize_text(t) for t in texts]
+        keep = [i for i, t in enumerate(canonical) if t]
+        texts = [canonical[i] for i in keep]
+        if not texts:
+            return {"texts": 0, "lexicon_share": 0.0, "lexicon_agreement": 1.0, "overall_agreement": 1.0}
+        language = self._languages(texts, language, keep)
+
+        model = [self._from_probs(p)[0] for p in self.engine.predict_proba(texts)]
+        accepted = agree = 0
+        for (pos, neg), label in zip(self.lexicon.counts_batch(texts, language), model):
+            if is_unambiguous(pos, neg, threshold):
+                accepted += 1
+                agree += label_from_counts(pos, neg)[0] == label
+        return {
+            "texts": len(texts),
+            "lexicon_share": accepted / len(texts),
+            "lexicon_agreement": agree / accepted if accepted else 1.0,
+            # Cascade output equals the model's everywhere except lexicon misses
+            "overall_agreement": 1.0 - (accepted - agree) / len(texts),
         }
 
-        lang = (language or "en").lower()
-        d = lex.get(lang, lex["en"])
-        words = set(re.findall(r"\w+|\w+'\w+", text.lower()))
-        pos = sum(1 for w in words if w in d["pos"])
-        neg = sum(1 for w in words if w in d["neg"])
-
-        if pos == neg:
-            return "neutral", 0.5
-        if pos > neg:
-            score = min(1.0, 0.5 + (pos - neg) * 0.1)
-            return "positive", score
-        score = min(1.0, 0.5 + (neg - pos) * 0.1)
-        return "negative", score
-        
\ No newline at end of file
+    @staticmethod
+    def _languages(
+        texts: List[str],
+        language: Union[str, Sequence[Optional[str]], None],
+        indices: List[int],
+    ) -> Union[str, List[str]]:
+        """One language per text of ``texts`` (taken from ``indices`` of the caller's input)."""
+        if isinstance(language, str):
+            return language
+        if language is None:
+            return detect_languages(texts)
+        picked = [language[i] for i in indices]
+        return [lang or detect_language(text) for lang, text in zip(picked, texts)]
+
+    def _from_probs(self, probs: List[float]) -> Tuple[str, float]:
+        best = max(range(len(probs)), key=probs.__getitem__)
+        raw_label = self.engine.id2label[best]
+        label = raw_label.lower()
+        score = float(probs[best])
+
+        # Normalize label to positive/neutral/negative if possible
+        if label in ("positive", "negative", "neutral"):
+            return label, score
+
+        mapping = self.config.get(
+            "label_mapping",
+            {"LABEL_0": "negative", "LABEL_1": "neutral", "LABEL_2": "positive"},
+        )
+        return mapping.get(raw_label, "neutral"), score
+
+    def _rule_based(self, text: str, language: Optional[str]) -> Tuple[str, float]:
+        return self.lexicon.predict(text, language or detect_language(text))
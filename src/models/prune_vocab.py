@@ -0,0 +1,230 @@
+"""Shrink XLM-R's 250k-token vocabulary to the pieces en/ar/fr text uses.
+
+Usage::
+
+    python -m src.models.prune_vocab CORPUS [CORPUS ...] [--holdout held_out.txt] [--output artifacts/pruned]
+
+Every corpus file (one text per line, or .jsonl/.csv/.tsv with ``--field``)
+is tokenized and the sentencepiece ids it uses are kept, together with the
+special tokens and every single-character Latin/Arabic/punctuation piece so
+unseen words still segment into characters rather than ``<unk>``. The
+adapter-merged classifier is saved with a reduced tokenizer and a sliced
+embedding matrix, and checked for tokenization and prediction parity on
+held-out text. The output is a regular merged artifact: point
+``merged_model_dir`` at it to serve it.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+import argparse
+import copy
+import json
+import unicodedata
+
+from src.helpers.config import load_config, resolve_path
+from src.models.parity import SAMPLE_TEXTS, compare_engines, read_sample
+
+# sentencepiece marks a word start with U+2581
+_WORD_START = "▁"
+
+
+def iter_corpus(path, text_field: str = "text") -> Iterator[str]:
+    """Texts of a corpus file: .jsonl/.csv/.tsv records or one text per line."""
+    from src.api.bulk import is_csv, read_csv, read_jsonl
+
+    suffix = Path(path).suffix.lower()
+    if is_csv(path):
+        records = read_csv(path)
+    elif suffix == ".jsonl":
+        records = read_jsonl(path)
+    else:
+        yield from read_sample(path)
+        return
+    for record, _ in records:
+        text = record.get(text_field)
+        if text:
+            yield str(text)
+
+
+def _keep_single_char(piece: str) -> bool:
+    """Single-character pieces of scripts we serve (Latin, Arabic, digits, punctuation)."""
+    char = piece[1:] if piece.startswith(_WORD_START) and len(piece) > 1 else piece
+    if len(char) != 1:
+        return False
+    if ord(char) < 0x250 or "؀" <= char <= "ۿ" or "ﭐ" <= char <= "﻿":
+        return True
+    return unicodedata.category(char)[0] in "PS"
+
+
+def collect_used_ids(tokenizer, texts: Iterable[str], chunk_size: int = 1000) -> Set[int]:
+    """Token ids produced for ``texts``, tokenized in chunks so memory stays flat."""
+    used: Set[int] = set()
+    chunk: List[str] = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) >= chunk_size:
+            for ids in tokenizer(chunk, add_special_tokens=False)["input_ids"]:
+                used.update(ids)
+            chunk = []
+    if chunk:
+        for ids in tokenizer(chunk, add_special_tokens=False)["input_ids"]:
+            used.update(ids)
+    return used
+
+
+def select_vocab(tokenizer, used: Set[int]) -> List[int]:
+    """Old ids to keep, in their original order (specials stay at the front)."""
+    vocab = json.loads(tokenizer.backend_tokenizer.to_str())["model"]["vocab"]
+    keep = set(used) | set(tokenizer.all_special_ids)
+    keep.update(i for i, (piece, _) in enumerate(vocab) if _keep_single_char(piece))
+    return sorted(keep)
+
+
+def _remap_post_processor(node: dict, old_to_new: Dict[int, int]) -> None:
+    kind = node.get("type")
+    if kind == "Sequence":
+        for child in node.get("processors", []):
+            _remap_post_processor(child, old_to_new)
+    elif kind == "TemplateProcessing":
+        for special in node.get("special_tokens", {}).values():
+            special["ids"] = [old_to_new[i] for i in special["ids"]]
+    elif kind in ("RobertaProcessing", "BertProcessing"):
+        for name in ("sep", "cls"):
+            token, old = node[name]
+            node[name] = [token, old_to_new[old]]
+
+
+def prune_tokenizer_json(data: dict, kept: Sequence[int]) -> dict:
+    """Unigram tokenizer.json restricted to ``kept`` ids (renumbered 0..n-1)."""
+    old_to_new = {old: new for new, old in enumerate(kept)}
+    model = data["model"]
+    if model.get("type") != "Unigram":
+        raise ValueError(f"Only sentencepiece Unigram tokenizers can be pruned, got {model.get('type')!r}")
+    model["vocab"] = [model["vocab"][old] for old in kept]
+    if model.get("unk_id") is not None:
+        model["unk_id"] = old_to_new[model["unk_id"]]
+    for token in data.get("added_tokens") or []:
+        token["id"] = old_to_new[token["id"]]
+    if data.get("post_processor"):
+        _remap_post_processor(data["post_processor"], old_to_new)
+    return data
+
+
+def prune_embeddings(model, kept: Sequence[int]) -> None:
+    """Slice the input embedding matrix to ``kept`` rows and fix the config ids."""
+    import torch
+
+    old_to_new = {old: new for new, old in enumerate(kept)}
+    old = model.get_input_embeddings()
+    pad_id = model.config.pad_token_id
+    new_pad = old_to_new.get(pad_id) if pad_id is not None else None
+    embedding = torch.nn.Embedding(len(kept), old.embedding_dim, padding_idx=new_pad)
+    with torch.no_grad():
+        embedding.weight.copy_(old.weight[torch.tensor(list(kept), dtype=torch.long)])
+    model.set_input_embeddings(embedding)
+    model.config.vocab_size = len(kept)
+    for name in ("pad_token_id", "bos_token_id", "eos_token_id"):
+        value = getattr(model.config, name, None)
+        if value is not None:
+            setattr(model.config, name, old_to_new[value])
+
+
+def _save_tokenizer(tokenizer, data: dict, kept: Sequence[int], output: Path) -> None:
+    old_to_new = {old: new for new, old in enumerate(kept)}
+    tokenizer.save_pretrained(output)
+    (output / "tokenizer.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    # The slow sentencepiece model still has the full vocabulary
+    for name in ("sentencepiece.bpe.model", "spiece.model"):
+        (output / name).unlink(missing_ok=True)
+    config_path = output / "tokenizer_config.json"
+    if config_path.exists():
+        config = json.loads(config_path.read_text(encoding="utf-8"))
+        if "added_tokens_decoder" in config:
+            config["added_tokens_decoder"] = {
+                str(old_to_new[int(k)]): v for k, v in config["added_tokens_decoder"].items()
+            }
+        config.pop("vocab_file", None)
+        config_path.write_text(json.dumps(config, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def tokenization_agreement(reference, candidate, kept: Sequence[int], texts: Sequence[str]) -> Dict[str, float]:
+    """How often the pruned tokenizer yields the same pieces, and its ``<unk>`` rate."""
+    old_to_new = {old: new for new, old in enumerate(kept)}
+    ref_ids = reference(list(texts), add_special_tokens=False)["input_ids"]
+    cand_ids = candidate(list(texts), add_special_tokens=False)["input_ids"]
+    same = 0
+    tokens = unk = 0
+    for ref, cand in zip(ref_ids, cand_ids):
+        same += [old_to_new.get(i, -1) for i in ref] == cand
+        tokens += len(cand)
+        unk += sum(1 for i in cand if i == candidate.unk_token_id)
+    return {
+        "texts": len(ref_ids),
+        "identical_tokenization": same / len(ref_ids) if ref_ids else 1.0,
+        "unk_rate": unk / tokens if tokens else 0.0,
+    }
+
+
+def prune_vocab(
+    corpus: Iterable[str],
+    output_dir=None,
+    holdout: Optional[Sequence[str]] = None,
+    config: Optional[dict] = None,
+) -> dict:
+    """Build the pruned merged classifier in ``output_dir`` and return a report."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    from src.models.engine import TorchEngine
+    from src.models.loader import load_classifier, write_source_manifest
+
+    cfg = {**(config or load_config()), "inference_mode": "fp32", "extra_adapters": {}}
+    output = resolve_path(output_dir or "artifacts/pruned")
+    tokenizer, model = load_classifier(cfg)
+    if hasattr(model, "merge_and_unload"):
+        model = model.merge_and_unload()
+    model.eval()
+    reference = TorchEngine(tokenizer, model)
+    original_vocab = model.config.vocab_size
+    original_params = sum(p.numel() for p in model.parameters())
+
+    kept = select_vocab(tokenizer, collect_used_ids(tokenizer, corpus))
+    data = prune_tokenizer_json(json.loads(tokenizer.backend_tokenizer.to_str()), kept)
+    output.mkdir(parents=True, exist_ok=True)
+    _save_tokenizer(tokenizer, data, kept, output)
+
+    # Prune a copy so the reference engine keeps the full embedding matrix
+    pruned = copy.deepcopy(model)
+    prune_embeddings(pruned, kept)
+    pruned.save_pretrained(output, safe_serialization=True)
+    write_source_manifest(output, cfg)
+
+    pruned_tokenizer = AutoTokenizer.from_pretrained(output)
+    candidate = TorchEngine(pruned_tokenizer, AutoModelForSequenceClassification.from_pretrained(output).eval())
+    holdout = list(holdout or SAMPLE_TEXTS)
+    hidden = model.config.hidden_size
+    return {
+        "output": str(output),
+        "vocab_size": {"original": original_vocab, "pruned": len(kept)},
+        "parameters": {"original": original_params, "pruned": sum(p.numel() for p in pruned.parameters())},
+        "embedding_mb_saved": round((original_vocab - len(kept)) * hidden * 4 / 2**20, 1),
+        "tokenization": tokenization_agreement(tokenizer, pruned_tokenizer, kept, holdout),
+        "parity": compare_engines(reference, candidate, holdout),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Prune the XLM-R vocabulary to tokens used by a corpus.")
+    parser.add_argument("corpus", nargs="+", help="Corpus files: one text per line, or .jsonl/.csv/.tsv.")
+    parser.add_argument("--field", default="text", help="Text field for .jsonl/.csv/.tsv corpora.")
+    parser.add_argument("--holdout", default=None, help="Held-out text file (one per line) for the parity check.")
+    parser.add_argument("--output", default="artifacts/pruned", help="Output directory.")
+    args = parser.parse_args(argv)
+
+    corpus = (text for path in args.corpus for text in iter_corpus(path, args.field))
+    holdout = read_sample(args.holdout) if args.holdout else None
+    report = prune_vocab(corpus, args.output, holdout)
+    print(json.dumps(report, indent=2))
+    print(f'Serve it with "merged_model_dir": "{args.output}"')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Dynamic int8 quantization for CPU inference.
+
+Set ``"inference_mode": "int8"`` in the config to have load_classifier()
+merge the LoRA adapter and quantize every ``nn.Linear`` to int8 weights with
+dynamically quantized activations. Check the accuracy cost with::
+
+    python -m src.models.quantize [--sample texts.txt]
+
+which prints label agreement and the max score delta against fp32.
+"""
+from typing import Dict, Optional, Sequence
+import argparse
+import copy
+import json
+
+from src.helpers.config import load_config
+from src.models.parity import SAMPLE_TEXTS, compare_engines, read_sample
+
+
+def quantize_dynamic_int8(model):
+    """Return an int8 dynamically quantized version of ``model``."""
+    import torch
+
+    if hasattr(model, "merge_and_unload"):
+        # Quantize the merged weights, not the LoRA wrappers
+        model = model.merge_and_unload()
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def check_parity(texts: Optional[Sequence[str]] = None, config: Optional[dict] = None) -> Dict[str, float]:
+    """Compare the int8 classifier against fp32 on a sample set."""
+    from src.models.engine import TorchEngine
+    from src.models.loader import load_classifier
+
+    cfg = {**(config or load_config()), "inference_mode": "fp32"}
+    tokenizer, reference = load_classifier(cfg)
+    if hasattr(reference, "merge_and_unload"):
+        reference = reference.merge_and_unload()
+    candidate = quantize_dynamic_int8(copy.deepcopy(reference))
+    return compare_engines(
+        TorchEngine(tokenizer, reference),
+        TorchEngine(tokenizer, candidate),
+        texts or SAMPLE_TEXTS,
+    )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compare int8 dynamic quantization against fp32.")
+    parser.add_argument("--sample", default=None, help="Text file with one sample per line.")
+    args = parser.parse_args(argv)
+
+    texts = read_sample(args.sample) if args.sample else None
+    print(json.dumps(check_parity(texts), indent=2))
+
+
+if __name__ == "__main__":
+    main()
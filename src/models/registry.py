@@ -0,0 +1,82 @@
+"""Process-wide registry of loaded classifiers.
+
+Nothing is loaded at import time. The first call to get_engine() for a given
+configuration loads the tokenizer and model; concurrent first callers block
+on the same load instead of each loading their own copy. api.py, main.py and
+SentimentPipeline all go through this module so a process holds one model.
+"""
+from typing import Callable, Optional
+import json
+import threading
+
+from src.helpers.config import DEFAULTS, load_config
+from src.models.engine import Engine
+from src.models.loader import create_engine
+
+# Config fields that change which weights get loaded
+_KEY_FIELDS = (
+    "backend",
+    "base_model",
+    "adapter_model",
+    "extra_adapters",
+    "num_labels",
+    "merged_model_dir",
+    "inference_mode",
+    "onnx_model_dir",
+    "student_model_dir",
+    "fast_path",
+)
+
+
+def resolve_config(config: Optional[dict] = None) -> dict:
+    """Fill a partial config with defaults, or load the project config."""
+    return load_config() if config is None else {**DEFAULTS, **config}
+
+
+def model_key(cfg: dict) -> tuple:
+    return tuple(json.dumps(cfg.get(field), sort_keys=True, default=str) for field in _KEY_FIELDS)
+
+
+class ModelRegistry:
+    def __init__(self, loader: Callable[[dict], Engine] = create_engine):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, config: Optional[dict] = None) -> Engine:
+        """Return the engine for the config, loading it on first use."""
+        cfg = resolve_config(config)
+        key = model_key(cfg)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                # Another thread may have finished loading while we waited
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._loader(cfg)
+                    self._entries[key] = entry
+        return entry
+
+    def add(self, config: Optional[dict], engine: Engine) -> None:
+        """Serve ``engine`` for the config, e.g. one finished after a fork."""
+        with self._lock:
+            self._entries[model_key(resolve_config(config))] = engine
+
+    def is_loaded(self, config: Optional[dict] = None) -> bool:
+        return model_key(resolve_config(config)) in self._entries
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_engine(config: Optional[dict] = None) -> Engine:
+    return registry.get(config)
+
+
+def warmup(config: Optional[dict] = None) -> None:
+    """Load the model eagerly, e.g. at service start instead of first request."""
+    registry.get(config)
@@ -0,0 +1,24 @@
+import pytest
+
+from src.api import api
+
+
+def test_analyze_documents_rejects_windows_past_the_position_limit(monkeypatch):
+    def no_engine(cfg):
+        raise AssertionError("validation must run before the model loads")
+
+    monkeypatch.setattr(api, "get_engine", no_engine)
+    with pytest.raises(ValueError, match="window_tokens must be at most 512"):
+        api.analyze_documents(["text"], window_tokens=1024)
+
+
+@pytest.mark.parametrize("stride", [126, 200])
+def test_analyze_documents_rejects_a_stride_that_fills_the_window(stride):
+    with pytest.raises(ValueError, match="stride must be less than window_tokens - 2"):
+        api.analyze_documents(["text"], window_tokens=128, stride=stride)
+
+
+def test_analyze_documents_validates_before_the_empty_check():
+    with pytest.raises(ValueError):
+        api.analyze_documents([], window_tokens=1024)
+    assert api.analyze_documents([], window_tokens=128, stride=64) == []
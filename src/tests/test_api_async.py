@@ -0,0 +1,85 @@
+import asyncio
+from concurrent.futures import Future
+
+import pytest
+
+from src.api import api
+from src.helpers.config import DEFAULTS
+
+
+class StubBatcher:
+    """Hands out futures the test resolves by hand."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, text, adapter=None):
+        future = Future()
+        self.submitted.append((text, adapter, future))
+        return future
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    stub = StubBatcher()
+    monkeypatch.setattr(api, "_config", {**DEFAULTS, "max_queue_depth": 1})
+    monkeypatch.setattr(api, "_batcher", stub)
+    return stub
+
+
+def test_returns_the_batcher_result(batcher):
+    async def run():
+        task = asyncio.ensure_future(api.analyze_sentiment_async("good", adapter="support"))
+        await asyncio.sleep(0)
+        text, adapter, future = batcher.submitted[0]
+        future.set_result({"input": text, "adapter": adapter})
+        return await task
+
+    assert asyncio.run(run()) == {"input": "good", "adapter": "support"}
+
+
+def test_overloaded_when_queue_is_full(batcher):
+    async def run():
+        first = asyncio.ensure_future(api.analyze_sentiment_async("first"))
+        await asyncio.sleep(0)
+        with pytest.raises(api.OverloadedError):
+            await api.analyze_sentiment_async("second")
+        # With wait=True the call queues for the slot instead
+        waiting = asyncio.ensure_future(api.analyze_sentiment_async("third", wait=True))
+        await asyncio.sleep(0)
+        assert len(batcher.submitted) == 1
+        batcher.submitted[0][2].set_result("first done")
+        assert await first == "first done"
+        await asyncio.sleep(0)
+        batcher.submitted[1][2].set_result("third done")
+        return await waiting
+
+    assert asyncio.run(run()) == "third done"
+    assert [text for text, _, _ in batcher.submitted] == ["first", "third"]
+
+
+def test_timeout_cancels_the_queued_request(batcher):
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await api.analyze_sentiment_async("slow", timeout=0.05)
+        # The slot is released for the next call
+        task = asyncio.ensure_future(api.analyze_sentiment_async("next"))
+        await asyncio.sleep(0)
+        batcher.submitted[1][2].set_result("ok")
+        return await task
+
+    assert asyncio.run(run()) == "ok"
+    assert batcher.submitted[0][2].cancelled()
+
+
+def test_waiting_for_a_slot_honours_the_timeout(batcher):
+    async def run():
+        first = asyncio.ensure_future(api.analyze_sentiment_async("first"))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await api.analyze_sentiment_async("second", wait=True, timeout=0.05)
+        batcher.submitted[0][2].set_result("done")
+        return await first
+
+    assert asyncio.run(run()) == "done"
+    assert len(batcher.submitted) == 1
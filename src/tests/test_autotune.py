@@ -0,0 +1,56 @@
+from src.helpers.config import DEFAULTS
+from src.models import autotune, loader
+
+
+def test_thread_candidates():
+    assert autotune.thread_candidates(1) == [1]
+    assert autotune.thread_candidates(4) == [1, 2, 4]
+    assert autotune.thread_candidates(6) == [1, 2, 4, 6]
+
+
+def test_pick_best_prefers_throughput_within_the_ceiling():
+    results = [
+        {"texts_per_second": 50.0, "p95_batch_ms": 40.0},
+        {"texts_per_second": 120.0, "p95_batch_ms": 90.0},
+        {"texts_per_second": 300.0, "p95_batch_ms": 400.0},
+    ]
+    assert autotune.pick_best(results, latency_ms=100.0) is results[1]
+
+
+def test_pick_best_falls_back_to_the_lowest_latency():
+    results = [
+        {"texts_per_second": 300.0, "p95_batch_ms": 400.0},
+        {"texts_per_second": 80.0, "p95_batch_ms": 150.0},
+    ]
+    assert autotune.pick_best(results, latency_ms=100.0) is results[1]
+
+
+def test_is_current(monkeypatch):
+    monkeypatch.setattr(autotune, "available_cpus", lambda: 8)
+    monkeypatch.setattr(loader, "model_identity", lambda config=None: "abc")
+    assert not autotune.is_current(None, DEFAULTS)
+    assert not autotune.is_current({}, DEFAULTS)
+    assert not autotune.is_current({"cpu_count": 4, "model": "abc"}, DEFAULTS)
+    assert not autotune.is_current({"cpu_count": 8, "model": "old"}, DEFAULTS)
+    assert autotune.is_current({"cpu_count": 8, "model": "abc"}, DEFAULTS)
+
+
+def test_onnx_sweeps_no_inter_op_candidates(monkeypatch):
+    swept = []
+
+    def fake_measure(config, inter_op, intra_op, batch_sizes, rounds):
+        swept.append(inter_op)
+        return [{
+            "intra_op_threads": 1, "inter_op_threads": inter_op, "batch_size": 8,
+            "texts_per_second": 100.0, "p95_batch_ms": 10.0,
+        }]
+
+    monkeypatch.setattr(autotune, "_measure_inter_op", fake_measure)
+    monkeypatch.setattr(loader, "model_identity", lambda config=None: "abc")
+    profile = autotune.calibrate({**DEFAULTS, "backend": "onnx"}, inter_op=(1, 2), intra_op=[1])
+    assert swept == [None]
+    assert profile["settings"]["inter_op_threads"] is None
+
+    swept.clear()
+    autotune.calibrate({**DEFAULTS, "backend": "torch"}, inter_op=(1, 2), intra_op=[1])
+    assert swept == [1, 2]
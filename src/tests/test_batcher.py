@@ -0,0 +1,78 @@
+import threading
+
+from src.api.batcher import MicroBatcher
+
+
+def _echo(calls):
+    def batch_fn(texts, adapter=None):
+        calls.append((adapter, list(texts)))
+        return [{"input": t, "adapter": adapter} for t in texts]
+
+    return batch_fn
+
+
+def test_results_follow_their_requests():
+    calls = []
+    batcher = MicroBatcher(_echo(calls), max_batch_size=8, max_wait_ms=20)
+    futures = [batcher.submit(str(i)) for i in range(5)]
+    assert [f.result(timeout=5)["input"] for f in futures] == ["0", "1", "2", "3", "4"]
+    batcher.close(timeout=5)
+    assert sum(len(texts) for _, texts in calls) == 5
+
+
+def test_groups_by_adapter():
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    echo = _echo(calls)
+
+    def batch_fn(texts, adapter=None):
+        started.set()
+        release.wait(5)
+        return echo(texts, adapter)
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=0)
+    # Keeps the worker busy while the mixed requests queue up behind it
+    first = batcher.submit("first")
+    assert started.wait(5)
+    batcher.max_wait = 0.05
+    requests = [("a", None), ("b", "support"), ("c", None), ("d", "support")]
+    futures = [batcher.submit(text, adapter) for text, adapter in requests]
+    release.set()
+    assert first.result(timeout=5)["adapter"] is None
+    assert [f.result(timeout=5)["adapter"] for f in futures] == [None, "support", None, "support"]
+    batcher.close(timeout=5)
+    assert calls == [(None, ["first"]), (None, ["a", "c"]), ("support", ["b", "d"])]
+
+
+def test_cancelled_requests_are_not_scored():
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    echo = _echo(calls)
+
+    def batch_fn(texts, adapter=None):
+        started.set()
+        release.wait(5)
+        return echo(texts, adapter)
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0)
+    running = batcher.submit("running")
+    assert started.wait(5)
+    cancelled = batcher.submit("cancelled")
+    assert cancelled.cancel()
+    kept = batcher.submit("kept")
+    release.set()
+    assert kept.result(timeout=5)["input"] == "kept"
+    assert running.result(timeout=5)["input"] == "running"
+    batcher.close(timeout=5)
+    assert [texts for _, texts in calls] == [["running"], ["kept"]]
+
+
+def test_errors_reach_every_caller_of_the_batch():
+    def batch_fn(texts, adapter=None):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=20)
+    futures = [batcher.submit("a"), batcher.submit("b")]
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+    batcher.close(timeout=5)
@@ -0,0 +1,44 @@
+import pytest
+
+from src.helpers.batching import estimate_forward_bytes, plan_batches
+
+
+def _flatten(batches):
+    return sorted(i for batch in batches for i in batch)
+
+
+def test_respects_max_batch_size():
+    batches = plan_batches([5] * 10, max_batch_size=4)
+    assert [len(b) for b in batches] == [4, 4, 2]
+    assert _flatten(batches) == list(range(10))
+
+
+def test_sorted_longest_first_under_token_budget():
+    lengths = [10, 200, 30, 190, 20]
+    batches = plan_batches(lengths, max_batch_size=8, max_batch_tokens=400)
+    assert batches == [[1, 3], [2, 4, 0]]
+    for batch in batches:
+        assert len(batch) * max(lengths[i] for i in batch) <= 400
+
+
+def test_oversized_input_gets_its_own_batch():
+    batches = plan_batches([1000, 10, 10], max_batch_size=8, max_batch_tokens=100)
+    assert batches == [[0], [1, 2]]
+
+
+def test_memory_budget():
+    estimate = lambda batch_size, seq_len: batch_size * seq_len
+    batches = plan_batches([50] * 6, max_batch_size=32, max_batch_bytes=100, estimate_bytes=estimate)
+    assert [len(b) for b in batches] == [2, 2, 2]
+
+
+def test_default_memory_estimate():
+    assert estimate_forward_bytes(2, 128) == 2 * estimate_forward_bytes(1, 128)
+    batches = plan_batches([128] * 4, max_batch_size=32, max_batch_bytes=estimate_forward_bytes(2, 128))
+    assert [len(b) for b in batches] == [2, 2]
+
+
+def test_empty_and_invalid():
+    assert plan_batches([], max_batch_size=4) == []
+    with pytest.raises(ValueError):
+        plan_batches([1], max_batch_size=0)
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from src.api.bulk import CHECKPOINT_SUFFIX, parse_records, read_jsonl, score_file
+
+
+def _score(seen):
+    def score_fn(texts):
+        seen.extend(texts)
+        return [{"sentiment": "neutral", "scores": {"neutral": 1.0}} for _ in texts]
+
+    return score_fn
+
+
+def _write_jsonl(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": i, "text": f"review {i}"}) + "\n")
+
+
+def _read_ids(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+
+def test_scores_every_record(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(source, 7)
+    seen = []
+    summary = score_file(source, output, batch_size=3, score_fn=_score(seen))
+    assert summary["done"] and summary["records"] == 7
+    assert _read_ids(output) == list(range(7))
+    assert seen == [f"review {i}" for i in range(7)]
+    # A finished job is not scored again
+    assert score_file(source, output, batch_size=3, score_fn=_score(seen))["scored_this_run"] == 7
+    assert len(seen) == 7
+
+
+def test_resumes_after_a_crash(tmp_path):
+    source, output = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(source, 10)
+    seen = []
+    score = _score(seen)
+
+    def crashing(texts):
+        if len(seen) >= 6:
+            raise RuntimeError("worker died")
+        return score(texts)
+
+    with pytest.raises(RuntimeError):
+        score_file(source, output, batch_size=2, checkpoint_every=2, score_fn=crashing)
+    checkpoint = json.loads((tmp_path / ("out.jsonl" + CHECKPOINT_SUFFIX)).read_text())
+    assert checkpoint["records"] == 4
+
+    resumed = []
+    summary = score_file(source, output, batch_size=2, checkpoint_every=2, score_fn=_score(resumed))
+    # Rows written after the last checkpoint are dropped and scored again
+    assert resumed == [f"review {i}" for i in range(4, 10)]
+    assert summary["records"] == 10 and summary["scored_this_run"] == 6
+    assert _read_ids(output) == list(range(10))
+
+
+def test_resumes_csv_by_record_count(tmp_path):
+    source, output = tmp_path / "in.csv", tmp_path / "out.jsonl"
+    source.write_text("id,text\n" + "".join(f"{i},review {i}\n" for i in range(5)), encoding="utf-8")
+    seen = []
+
+    def crashing(texts):
+        if seen:
+            raise RuntimeError("worker died")
+        return _score(seen)(texts)
+
+    with pytest.raises(RuntimeError):
+        score_file(source, output, batch_size=2, checkpoint_every=1, score_fn=crashing)
+    resumed = []
+    score_file(source, output, batch_size=2, checkpoint_every=1, score_fn=_score(resumed))
+    assert resumed == ["review 2", "review 3", "review 4"]
+    assert _read_ids(output) == ["0", "1", "2", "3", "4"]
+
+
+def test_rejects_a_checkpoint_of_another_input(tmp_path):
+    first, second, output = tmp_path / "a.jsonl", tmp_path / "b.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(first, 2)
+    _write_jsonl(second, 2)
+    score_file(first, output, score_fn=_score([]))
+    with pytest.raises(ValueError):
+        score_file(second, output, score_fn=_score([]))
+    assert score_file(second, output, resume=False, score_fn=_score([]))["records"] == 2
+
+
+def test_read_jsonl_rejects_non_object_lines(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"text": "good"}\n["bad"]\n', encoding="utf-8")
+    records = read_jsonl(path)
+    assert next(records)[0] == {"text": "good"}
+    with pytest.raises(ValueError, match="byte 17: expected a JSON object, got list"):
+        next(records)
+
+
+def test_parse_records_rejects_non_object_lines():
+    assert parse_records(b'{"text": "good"}\n', "in.jsonl") == [{"text": "good"}]
+    with pytest.raises(ValueError, match="in.jsonl, line 3: expected a JSON object, got str"):
+        parse_records(b'{"text": "good"}\n\n"bad"\n', "in.jsonl")
@@ -0,0 +1,74 @@
+from src.helpers.cache import PredictionCache
+
+POSITIVE = {"sentiment": "positive", "scores": {"positive": 0.9}}
+NEGATIVE = {"sentiment": "negative", "scores": {"negative": 0.8}}
+
+
+def test_lru_eviction():
+    cache = PredictionCache("model", max_entries=2)
+    cache.put_many(["a", "b"], [POSITIVE, NEGATIVE])
+    # Touch "a" so "b" is the least recently used
+    assert cache.get_many(["a"]) == [POSITIVE]
+    cache.put_many(["c"], [POSITIVE])
+    assert cache.get_many(["a", "b", "c"]) == [POSITIVE, None, POSITIVE]
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_keys_use_normalized_text():
+    cache = PredictionCache("model")
+    cache.put_many(["  great   product "], [POSITIVE])
+    assert cache.get_many(["great product"]) == [POSITIVE]
+
+
+def test_variants_are_kept_apart():
+    cache = PredictionCache("model")
+    cache.put_many(["text"], [POSITIVE])
+    cache.put_many(["text"], [NEGATIVE], variant="support")
+    assert cache.get_many(["text"]) == [POSITIVE]
+    assert cache.get_many(["text"], variant="support") == [NEGATIVE]
+
+
+def test_disk_tier_survives_reopen(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    PredictionCache("model", path=path).put_many(["a"], [POSITIVE])
+
+    reopened = PredictionCache("model", path=path)
+    assert reopened.get_many(["a", "b"]) == [POSITIVE, None]
+    assert reopened.stats()["disk_hits"] == 1
+    # Promoted into memory on the disk hit
+    assert reopened.get_many(["a"]) == [POSITIVE]
+    assert reopened.stats()["hits"] == 1
+
+
+def test_namespaces_share_a_file_without_purging(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    old = PredictionCache("old-model", path=path)
+    old.put_many(["a"], [POSITIVE])
+    new = PredictionCache("new-model", path=path)
+    assert new.get_many(["a"]) == [None]
+    new.put_many(["a"], [NEGATIVE])
+
+    # Opening either namespace again keeps the other's rows
+    assert PredictionCache("old-model", path=path).get_many(["a"]) == [POSITIVE]
+    assert PredictionCache("new-model", path=path).get_many(["a"]) == [NEGATIVE]
+
+
+def test_clear_and_purge_are_explicit(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    old = PredictionCache("old-model", path=path)
+    old.put_many(["a", "b"], [POSITIVE, POSITIVE])
+    new = PredictionCache("new-model", path=path)
+    new.put_many(["a"], [NEGATIVE])
+
+    new.clear()
+    assert PredictionCache("new-model", path=path).get_many(["a"]) == [None]
+    assert PredictionCache("old-model", path=path).get_many(["a"]) == [POSITIVE]
+
+    new.put_many(["a"], [NEGATIVE])
+    assert new.purge_other_namespaces() == 2
+    assert PredictionCache("old-model", path=path).get_many(["a"]) == [None]
+    assert PredictionCache("new-model", path=path).get_many(["a"]) == [NEGATIVE]
+    assert PredictionCache("memory-only").purge_other_namespaces() == 0
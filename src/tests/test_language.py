@@ -0,0 +1,33 @@
+from src.helpers.language import detect_language, detect_languages, partition_by_language
+
+SAMPLES = {
+    "The service was great and I love it": "en",
+    "J'aime beaucoup cet hôtel, le personnel est très gentil": "fr",
+    "c'est nul": "fr",
+    "الخدمة ممتازة جدا": "ar",
+    # Code-switched: brand names and numbers in Latin script
+    "موبايل iPhone 15 pro max ممتاز": "ar",
+    "The hotel was great, شكرا": "en",
+}
+
+
+def test_detect_language():
+    for text, expected in SAMPLES.items():
+        assert detect_language(text) == expected, text
+
+
+def test_detect_languages_matches_detect_language():
+    texts = list(SAMPLES)
+    assert detect_languages(texts) == [detect_language(t) for t in texts]
+
+
+def test_no_signal_returns_default():
+    assert detect_language("iPhone 15 pro max") == "en"
+    assert detect_language("12345", default="fr") == "fr"
+    assert detect_language("") == "en"
+
+
+def test_partition_by_language_keeps_input_order():
+    texts = ["good and the best", "الخدمة ممتازة", "je suis content", "it is fine"]
+    assert partition_by_language(texts) == {"en": [0, 3], "ar": [1], "fr": [2]}
+    assert partition_by_language(texts, ["fr", "fr", "ar", "fr"]) == {"fr": [0, 1, 3], "ar": [2]}
@@ -0,0 +1,67 @@
+import time
+
+from src.models.lexicon import LexiconScorer
+
+scorer = LexiconScorer()
+
+
+def test_single_words():
+    assert scorer.counts("This is a GREAT product", "en") == (1, 0)
+    assert scorer.counts("bad, bad and terrible", "en") == (0, 2)
+    assert scorer.predict("nothing to say", "en") == ("neutral", 0.5)
+
+
+def test_whole_words_only():
+    assert scorer.counts("goodness me, badminton", "en") == (0, 0)
+
+
+def test_multi_word_phrases():
+    assert scorer.counts("je déteste ce film", "fr") == (0, 1)
+    # Any run of whitespace inside a phrase matches
+    assert scorer.counts("Je   déteste\tça", "fr") == (0, 1)
+    assert scorer.counts("je ne déteste pas", "fr") == (0, 0)
+    assert scorer.counts("j'aime ce restaurant", "fr") == (1, 0)
+
+
+def test_arabic_clitics():
+    # wa + al + word, feminine ending, attached pronoun
+    assert scorer.counts("والسعيد", "ar") == (1, 0)
+    assert scorer.counts("جميلة", "ar") == (1, 0)
+    assert scorer.counts("فيلم رائعه", "ar") == (1, 0)
+    assert scorer.counts("بالسيئ", "ar") == (0, 1)
+    assert scorer.counts("الخدمة سيئة والطعام رائع", "ar") == (1, 1)
+
+
+def test_unknown_language_falls_back_to_english():
+    assert scorer.counts("great", "de") == (1, 0)
+    assert scorer.counts("great", None) == (1, 0)
+
+
+def test_batch_matches_single_calls():
+    texts = ["great", "je déteste", "رائع", "meh", "bad and awful"]
+    languages = ["en", "fr", "ar", None, "en"]
+    assert scorer.predict_batch(texts, languages) == [scorer.predict(t, l) for t, l in zip(texts, languages)]
+    assert scorer.counts_batch(["great", "bad"], "en") == [(1, 0), (0, 1)]
+    assert scorer.predict_batch(["great", "bad"], "en") == [scorer.predict("great", "en"), scorer.predict("bad", "en")]
+
+
+def test_scores():
+    assert scorer.predict("good and great", "en") == ("positive", 0.7)
+    assert scorer.predict("bad", "en") == ("negative", 0.6)
+    assert scorer.predict("good bad", "en") == ("neutral", 0.5)
+    many = " ".join(["good", "great", "excellent", "love", "amazing", "happy", "awesome"])
+    assert scorer.predict(many, "en") == ("positive", 1.0)
+
+
+def test_throughput():
+    texts = [
+        "The staff was great but the room was terrible and the food was bad",
+        "Le personnel est génial mais je déteste la chambre",
+        "الخدمة ممتازة لكن الغرفة سيئة جدا",
+    ] * 10000
+    languages = ["en", "fr", "ar"] * 10000
+    started = time.perf_counter()
+    scorer.predict_batch(texts, languages)
+    # Comfortably under a second on any CI machine; a backtracking pattern
+    # would take far longer
+    assert time.perf_counter() - started < 2.0
@@ -0,0 +1,75 @@
+from src.helpers.metrics import METRIC_NAME, MetricsRegistry, size_bucket
+
+
+def test_disabled_timer_is_a_shared_no_op():
+    registry = MetricsRegistry()
+    first, second = registry.timer("forward", batch_size=4), registry.timer("tokenize")
+    assert first is second
+    with first:
+        pass
+    registry.observe("forward", 0.1)
+    assert registry.summary() == []
+
+
+def test_timer_records_when_enabled():
+    registry = MetricsRegistry(enabled=True)
+    with registry.timer("forward", batch_size=3, seq_len=100):
+        pass
+    assert [row["stage"] for row in registry.summary()] == ["forward"]
+    assert 'batch_size="4"' in registry.render_prometheus()
+    assert 'seq_len="128"' in registry.render_prometheus()
+
+
+def test_size_bucket():
+    assert [size_bucket(n) for n in (0, 1, 2, 3, 4, 5, 64, 65, 512)] == ["1", "1", "2", "4", "4", "8", "64", "128", "512"]
+
+
+def test_prometheus_buckets_are_cumulative():
+    registry = MetricsRegistry(enabled=True, buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.01, 0.05, 0.5, 5.0):
+        registry.observe("forward", seconds, batch_size=8)
+    lines = registry.render_prometheus().splitlines()
+    assert lines[:2] == [
+        f"# HELP {METRIC_NAME} Time spent in each inference stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    labels = 'stage="forward",batch_size="8"'
+    assert lines[2:] == [
+        f'{METRIC_NAME}_bucket{{{labels},le="0.01"}} 2',
+        f'{METRIC_NAME}_bucket{{{labels},le="0.1"}} 3',
+        f'{METRIC_NAME}_bucket{{{labels},le="1.0"}} 4',
+        f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} 5',
+        f"{METRIC_NAME}_sum{{{labels}}} {0.005 + 0.01 + 0.05 + 0.5 + 5.0!r}",
+        f"{METRIC_NAME}_count{{{labels}}} 5",
+    ]
+
+
+def test_prometheus_escapes_label_values():
+    registry = MetricsRegistry(enabled=True)
+    registry.observe('say "hi"\\\n', 0.001)
+    assert 'stage="say \\"hi\\"\\\\\\n"' in registry.render_prometheus()
+
+
+def test_hooks():
+    registry = MetricsRegistry(enabled=True)
+    seen = []
+    hook = lambda stage, seconds, labels: seen.append((stage, seconds, labels))
+    registry.add_hook(hook)
+    registry.observe("tokenize", 0.25, batch_size=5, seq_len=30)
+    registry.remove_hook(hook)
+    registry.observe("tokenize", 0.5)
+    assert seen == [("tokenize", 0.25, {"batch_size": "8", "seq_len": "32"})]
+
+
+def test_summary_merges_label_values_per_stage():
+    registry = MetricsRegistry(enabled=True, buckets=(0.01, 0.1, 1.0))
+    registry.observe("forward", 0.004, batch_size=1)
+    registry.observe("forward", 0.05, batch_size=32)
+    registry.observe("forward", 0.5, batch_size=32)
+    registry.observe("cache_lookup", 0.002)
+    assert registry.summary() == [
+        {"stage": "cache_lookup", "count": 1, "total_ms": 2.0, "mean_ms": 2.0, "p50_ms_le": 10.0, "p95_ms_le": 10.0},
+        {"stage": "forward", "count": 3, "total_ms": 554.0, "mean_ms": 184.667, "p50_ms_le": 100.0, "p95_ms_le": 1000.0},
+    ]
+    registry.reset()
+    assert registry.summary() == []
@@ -0,0 +1,96 @@
+import pytest
+
+from src.models.pipeline import SentimentPipeline
+
+POSITIVE = [0.1, 0.1, 0.8]
+
+
+class StubEngine:
+    """Scores every text positive and records what it was asked."""
+
+    id2label = {0: "LABEL_0", 1: "LABEL_1", 2: "LABEL_2"}
+
+    def __init__(self):
+        self.seen = []
+
+    def predict_proba(self, texts):
+        self.seen.extend(texts)
+        return [POSITIVE for _ in texts]
+
+
+def _pipeline(**config):
+    pipeline = SentimentPipeline({"use_transformers": False, **config})
+    pipeline.engine = StubEngine()
+    return pipeline
+
+
+def test_threshold_gates_the_lexicon():
+    pipeline = _pipeline(cascade_enabled=True, cascade_threshold=0.7)
+    texts = ["good and great", "good", "good but bad", "nothing here"]
+    results = pipeline.predict_batch(texts, "en")
+    # Two one-sided hits reach 0.7; one hit (0.6) or mixed evidence goes to the model
+    assert results[0] == ("positive", 0.7)
+    assert results[1:] == [("positive", 0.8)] * 3
+    assert pipeline.engine.seen == ["good", "good but bad", "nothing here"]
+
+    lower = _pipeline(cascade_enabled=True, cascade_threshold=0.6)
+    assert lower.predict_batch(["good", "bad"], "en") == [("positive", 0.6), ("negative", 0.6)]
+    assert lower.engine.seen == []
+
+
+def test_counters_add_up():
+    pipeline = _pipeline(cascade_enabled=True)
+    pipeline.predict_batch(["good and great", "bad and awful", "meh"], "en")
+    pipeline.predict("so so", "en")
+    assert pipeline.cascade_stats() == {"lexicon": 2, "model": 2, "total": 4, "lexicon_share": 0.5}
+
+
+def test_cascade_off_sends_everything_to_the_model_once():
+    pipeline = _pipeline()
+    results = pipeline.predict_batch(["good and great", "  good and great ", "", "bad"], "en")
+    assert results == [("positive", 0.8), ("positive", 0.8), ("neutral", 0.0), ("positive", 0.8)]
+    assert pipeline.engine.seen == ["good and great", "bad"]
+    assert pipeline.cascade_stats()["lexicon"] == 0
+
+
+def test_evaluate_cascade():
+    pipeline = _pipeline(cascade_enabled=True)
+    report = pipeline.evaluate_cascade(["good and great", "bad and awful", "meh", ""], "en")
+    # The stub model says positive everywhere, so the negative lexicon hit disagrees
+    assert report == {
+        "texts": 3,
+        "lexicon_share": pytest.approx(2 / 3),
+        "lexicon_agreement": 0.5,
+        "overall_agreement": pytest.approx(2 / 3),
+    }
+    assert pipeline.evaluate_cascade(["great"], "en", threshold=0.6)["lexicon_share"] == 1.0
+    # Evaluation does not count as traffic
+    assert pipeline.cascade_stats()["total"] == 0
+
+
+def test_evaluate_cascade_needs_the_model():
+    with pytest.raises(RuntimeError):
+        SentimentPipeline({"use_transformers": False}).evaluate_cascade(["good"])
+
+
+def test_language_is_detected_when_omitted():
+    pipeline = SentimentPipeline({"use_transformers": False})
+    assert pipeline.engine is None
+    assert pipeline.predict("je déteste ce film") == ("negative", 0.6)
+    assert pipeline.predict("الخدمة رائعة") == ("positive", 0.6)
+    assert pipeline.predict_batch(["je déteste ce film", "الخدمة رائعة", "great"]) == [
+        ("negative", 0.6),
+        ("positive", 0.6),
+        ("positive", 0.6),
+    ]
+    # None entries of a per-text list are detected; given codes are used as is
+    assert pipeline.predict_batch(["je déteste ce film", "je déteste ce film"], [None, "en"]) == [
+        ("negative", 0.6),
+        ("neutral", 0.5),
+    ]
+
+
+def test_cascade_detects_language_for_the_lexicon():
+    pipeline = _pipeline(cascade_enabled=True)
+    assert pipeline.predict("je déteste ce film, c'est affreux") == ("negative", 0.7)
+    assert pipeline.engine.seen == []
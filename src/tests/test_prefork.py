@@ -0,0 +1,78 @@
+import argparse
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from src.api import api, prefork
+from src.helpers.config import DEFAULTS
+from src.models import compile as fast_path, loader
+from src.models.registry import registry
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """create_engine() on a stub model; records enable_fast_path calls by pid."""
+    model = SimpleNamespace(config=SimpleNamespace(id2label={0: "negative", 1: "neutral", 2: "positive"}))
+    calls = []
+    monkeypatch.setattr(loader, "load_classifier", lambda cfg: (None, model))
+    monkeypatch.setattr(loader, "apply_thread_settings", lambda cfg: None)
+    monkeypatch.setattr(fast_path, "enable_fast_path", lambda engine, cfg: calls.append(os.getpid()) or engine)
+    monkeypatch.setattr(registry, "_entries", {})
+    monkeypatch.setattr(api, "_config", {**DEFAULTS, "fast_path": True})
+    return calls
+
+
+def test_serve_never_compiles_in_the_parent(fake_model, monkeypatch):
+    forks = []
+    monkeypatch.setattr(os, "fork", lambda: forks.append(1) or 4242 + len(forks))
+
+    def wait():
+        raise ChildProcessError
+
+    monkeypatch.setattr(os, "wait", wait)
+    monkeypatch.setattr(prefork.gc, "freeze", lambda: None)
+    monkeypatch.setattr(prefork.signal, "signal", lambda signum, handler: None)
+    args = argparse.Namespace(host="127.0.0.1", port=0, max_batch_size=8, max_wait_ms=5.0)
+
+    prefork.serve(args, workers=2, threads=1)
+    assert len(forks) == 2
+    assert fake_model == []
+    assert registry.is_loaded({**api._config, "fast_path": False})
+    assert not registry.is_loaded(api._config)
+
+
+def test_workers_start_the_fast_path(fake_model):
+    cfg = api._config
+    registry.get({**cfg, "fast_path": False})
+    prefork._start_fast_path(cfg)
+    assert fake_model == [os.getpid()]
+    assert registry.is_loaded(cfg)
+
+
+def test_serve_rejects_fast_path_without_fp32(fake_model, monkeypatch):
+    monkeypatch.setattr(api, "_config", {**DEFAULTS, "fast_path": True, "inference_mode": "int8"})
+    monkeypatch.setattr(os, "fork", lambda: pytest.fail("forked"))
+    args = argparse.Namespace(host="127.0.0.1", port=0, max_batch_size=8, max_wait_ms=5.0)
+    with pytest.raises(ValueError):
+        prefork.serve(args, workers=1, threads=1)
+
+
+def test_plan_workers_from_workers():
+    assert prefork.plan_workers(4, None, cpus=8) == (4, 2)
+
+
+def test_plan_workers_from_threads():
+    assert prefork.plan_workers(None, 2, cpus=8) == (4, 2)
+
+
+def test_plan_workers_defaults_to_one_worker_per_core(monkeypatch):
+    assert prefork.plan_workers(cpus=8) == (8, 1)
+    monkeypatch.setattr(prefork, "available_cpus", lambda: 3)
+    assert prefork.plan_workers() == (3, 1)
+
+
+def test_plan_workers_keeps_oversubscribed_inputs():
+    assert prefork.plan_workers(16, None, cpus=8) == (16, 1)
+    assert prefork.plan_workers(None, 16, cpus=8) == (1, 16)
+    assert prefork.plan_workers(4, 4, cpus=8) == (4, 4)
@@ -0,0 +1,77 @@
+from concurrent.futures import Future
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.api import api
+from src.api.server import make_server
+from src.helpers.config import DEFAULTS
+
+
+class StubBatcher:
+    """Resolves every text at once with its input and adapter."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, text, adapter=None):
+        self.submitted.append((text, adapter))
+        future = Future()
+        future.set_result({"input": text, "adapter": adapter})
+        return future
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(api, "_config", {**DEFAULTS, "extra_adapters": {"support": "adapters/support"}})
+    batcher = StubBatcher()
+    server = make_server("127.0.0.1", 0, batcher)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server, batcher
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, body):
+    """POST ``body`` (bytes, or JSON-encoded) to /analyze; returns (status, JSON reply)."""
+    data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}/analyze", data=data)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_text_returns_one_result(server):
+    server, batcher = server
+    assert post(server, {"text": "good"}) == (200, {"input": "good", "adapter": None})
+
+
+def test_texts_return_a_list(server):
+    server, batcher = server
+    status, body = post(server, {"texts": ["good", "bad"], "adapter": "support"})
+    assert status == 200
+    assert body == [{"input": "good", "adapter": "support"}, {"input": "bad", "adapter": "support"}]
+
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    ["good"],
+    {},
+    {"text": 3},
+    {"texts": ["good", None]},
+    {"texts": ["good", 3]},
+    {"text": "good", "adapter": 1},
+    {"text": "good", "adapter": "missing"},
+])
+def test_bad_requests_are_rejected(server, body):
+    server, batcher = server
+    status, reply = post(server, body)
+    assert status == 400
+    assert "error" in reply
+    assert batcher.submitted == []
@@ -0,0 +1,34 @@
+from src.helpers.text import dedupe, normalize_text
+
+
+def test_normalize_collapses_whitespace_and_keeps_case():
+    assert normalize_text("  Great\t\tproduct \n ") == "Great product"
+    assert normalize_text("Great") != normalize_text("great")
+
+
+def test_normalize_strips_arabic_tatweel_and_harakat():
+    assert normalize_text("جمـــيل") == "جميل"
+    assert normalize_text("جَمِيلٌ") == "جميل"
+
+
+def test_normalize_straightens_quotes_and_drops_zero_width():
+    assert normalize_text("l’hôtel") == "l'hôtel"
+    assert normalize_text("“super”") == '"super"'
+    assert normalize_text("bon\u200bjour\u200f") == "bonjour"
+
+
+def test_normalize_applies_nfkc():
+    assert normalize_text("\ufb01ne") == "fine"
+    assert normalize_text("e\u0301") == "\u00e9"
+
+
+def test_dedupe_maps_every_input_to_its_canonical_form():
+    texts = ["Good", "  Good ", "j’aime", "j'aime", "Bad", "Good"]
+    unique, inverse = dedupe(texts)
+    assert unique == ["Good", "j'aime", "Bad"]
+    assert inverse == [0, 0, 1, 1, 2, 0]
+    assert [unique[i] for i in inverse] == [normalize_text(t) for t in texts]
+
+
+def test_dedupe_empty():
+    assert dedupe([]) == ([], [])
@@ -0,0 +1,98 @@
+"""End-to-end run of the loader, registry and API on a tiny local model.
+
+Needs torch, transformers, peft and tokenizers; skipped without them.
+"""
+import json
+
+import pytest
+
+for module in ("torch", "transformers", "peft", "tokenizers"):
+    pytest.importorskip(module)
+
+import numpy as np
+
+from src.api import api
+from src.benchmarks.tiny_model import build_tiny_model
+from src.helpers.config import DEFAULTS
+from src.models.engine import TorchEngine
+from src.models.loader import (
+    MANIFEST_NAME,
+    build_merged_artifact,
+    load_classifier,
+    merged_artifact_path,
+    model_identity,
+)
+from src.models.registry import get_engine, registry
+
+LABELS = {"negative", "neutral", "positive"}
+
+
+@pytest.fixture(scope="module")
+def overrides(tmp_path_factory):
+    return build_tiny_model(tmp_path_factory.mktemp("tiny"))
+
+
+@pytest.fixture
+def configured(overrides, monkeypatch):
+    # configure() replaces module state; monkeypatch puts it back afterwards
+    for name in ("_config", "_config_explicit", "_cache"):
+        monkeypatch.setattr(api, name, getattr(api, name))
+    api.configure({**overrides, "cache_enabled": True})
+    yield {**DEFAULTS, **overrides}
+    registry.clear()
+
+
+def test_loader_uses_the_adapter_without_a_merged_artifact(overrides):
+    cfg = {**DEFAULTS, **overrides}
+    assert merged_artifact_path(cfg) is None
+    tokenizer, model = load_classifier(cfg)
+    assert hasattr(model, "peft_config")
+    assert not model.training
+    assert len(tokenizer("hello world")["input_ids"]) > 2
+
+
+def test_registry_loads_once(configured):
+    engine = get_engine(configured)
+    assert get_engine(configured) is engine
+    assert registry.is_loaded(configured)
+
+
+def test_api_end_to_end(configured):
+    result = api.analyze_sentiment("I love this hotel")
+    assert set(result) == {"input", "sentiment", "scores"}
+    assert result["sentiment"] in LABELS and set(result["scores"]) == LABELS
+    assert sum(result["scores"].values()) == pytest.approx(1.0, abs=1e-3)
+
+    texts = ["Great   service", "Great service", "الخدمة سيئة", "c'est nul"]
+    results = api.analyze_sentiment_batch(texts)
+    assert [r["input"] for r in results] == texts
+    assert results[0]["scores"] == results[1]["scores"]
+    assert api.analyze_sentiment("Great service")["scores"] == results[1]["scores"]
+    assert api.cache_stats()["hits"] >= 1
+
+    documents = api.analyze_documents(["The room was fine. " * 40, "short"], window_tokens=32, stride=8)
+    assert documents[0]["num_windows"] > 1 and documents[1]["num_windows"] == 1
+    assert all(d["sentiment"] in LABELS for d in documents)
+
+
+def test_merged_artifact_matches_adapter_and_checks_its_source(overrides):
+    cfg = {**DEFAULTS, **overrides}
+    texts = ["I love it", "je déteste ça", "الخدمة ممتازة"]
+    adapter_scores = TorchEngine(*load_classifier(cfg)).predict_proba(texts)
+    adapter_identity = model_identity(cfg)
+
+    path = build_merged_artifact(config=cfg)
+    assert json.loads((path / MANIFEST_NAME).read_text())["adapter_model"] == overrides["adapter_model"]
+    assert merged_artifact_path(cfg) == path
+    tokenizer, model = load_classifier(cfg)
+    assert not hasattr(model, "peft_config")
+    merged_scores = TorchEngine(tokenizer, model).predict_proba(texts)
+    assert np.allclose(adapter_scores, merged_scores, atol=1e-4)
+    assert model_identity(cfg) != adapter_identity
+
+    # An artifact merged from another adapter is never served
+    other = {**cfg, "adapter_model": overrides["adapter_model"] + "-retrained"}
+    assert merged_artifact_path(other) is None
+    (path / MANIFEST_NAME).unlink()
+    assert merged_artifact_path(cfg) is None
+    assert model_identity(cfg) == adapter_identity